@@ -1,36 +1,345 @@
 # app.py
 
-from flask import Flask, request, jsonify, render_template # <-- Tambahkan render_template di sini
-from flask_restful import Resource, Api
+from flask import Blueprint, Flask, Response, current_app, g, has_request_context, request, jsonify, render_template, stream_with_context # <-- Tambahkan render_template di sini
+from flask_restful import Resource, Api, abort
+from flask_restful.representations.json import output_json as restful_output_json
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, timedelta
-from urllib.parse import quote_plus
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from sqlalchemy import and_, case, create_mock_engine, delete, event, func, insert, literal, or_, select, union_all, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects.mysql import insert as mysql_insert, match as mysql_match
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload, selectinload
+from datetime import datetime, date, timedelta, timezone
+from urllib.parse import quote_plus, urlencode
 from flask_cors import CORS
-
-app = Flask(__name__)
+import click
+from werkzeug.http import http_date, parse_date, quote_etag, unquote_etag
+from werkzeug.local import LocalProxy
+from cache import create_cache
+from events import create_broker
+from metrics import COUNT_BUCKETS, SIZE_BUCKETS, Registry
+from serializers import compile_serializer, create_json_backend
+from collections import Counter
+from functools import wraps
+import base64
+import binascii
+import csv
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
 
 # --- Konfigurasi Database MySQL---
-DB_USER = 'go_user'
-DB_PASSWORD = 'Sanders123!'
-DB_HOST = '127.0.0.1'
-DB_PORT = '3306'
-DB_NAME = 'perpustakaan_db'
+# Setiap nilai bisa ditimpa lewat environment; DATABASE_URL menimpa seluruh URI
+DB_USER = os.environ.get('DB_USER', 'go_user')
+DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Sanders123!')
+DB_HOST = os.environ.get('DB_HOST', '127.0.0.1')
+DB_PORT = os.environ.get('DB_PORT', '3306')
+DB_NAME = os.environ.get('DB_NAME', 'perpustakaan_db')
 
 encoded_password = quote_plus(DB_PASSWORD)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+pymysql://{DB_USER}:{encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db = SQLAlchemy(app)
-api = Api(app)
-CORS(app)
+class Config:
+    """Konfigurasi bawaan; create_app(config) dapat menimpa nilai mana pun."""
+
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f"mysql+pymysql://{DB_USER}:{encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # --- Konfigurasi Pool Koneksi ---
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30)) # detik menunggu koneksi bebas
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800)) # detik, harus di bawah wait_timeout MySQL
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+
+    # --- Konfigurasi Replica Baca ---
+    # URL replica dipisah koma. Kosong = semua query ke primary.
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    # Setelah menulis, baca client tersebut (cookie) tetap ke primary selama jendela ini, dan hasil baca
+    # replica untuk tag yang baru diinvalidasi tidak di-cache (replica mungkin belum menyusul)
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+    # --- Konfigurasi Sweeper Keterlambatan ---
+    OVERDUE_SWEEP_ENABLED = True
+    OVERDUE_SWEEP_INTERVAL = 15 * 60 # detik
+
+    # --- Konfigurasi Arsip Riwayat Peminjaman ---
+    ARCHIVE_ENABLED = True
+    ARCHIVE_RETENTION_DAYS = 365 # peminjaman yang sudah kembali lebih lama dari ini dipindah ke arsip
+    ARCHIVE_BATCH_SIZE = 1000 # baris per transaksi, agar lock dan undo log tetap kecil
+    ARCHIVE_BATCH_PAUSE = 0.1 # detik jeda antar batch, memberi ruang bagi transaksi sirkulasi
+    ARCHIVE_INTERVAL = 6 * 60 * 60 # detik
+
+    # --- Konfigurasi Profiling ---
+    PROFILE_REQUESTS_ENABLED = True # izinkan ?profile=1 / header X-Profile: 1
+    PROFILE_N_PLUS_ONE_THRESHOLD = 5 # statement identik lebih dari ini dalam satu request = N+1
+
+    # --- Konfigurasi Cache ---
+    CACHE_BACKEND = 'memory' # 'memory' (LRU/TTL per proses) atau 'redis'
+    CACHE_REDIS_URL = 'redis://127.0.0.1:6379/0'
+    CACHE_TTL = 300 # detik
+    CACHE_MAX_ENTRIES = 10000
+
+    # --- Konfigurasi Live Update (Server-Sent Events) ---
+    EVENTS_BACKEND = 'memory' # 'memory' (per proses) atau 'redis' (dibagi antar worker)
+    EVENTS_REDIS_URL = 'redis://127.0.0.1:6379/0'
+    EVENTS_BUFFER_SIZE = 1000 # event terakhir yang disimpan untuk replay Last-Event-ID
+    EVENTS_QUEUE_SIZE = 1000 # antrean per koneksi; client yang tertinggal menerima 'resync'
+    EVENTS_KEEPALIVE = 15 # detik; komentar keepalive juga mendeteksi koneksi yang sudah putus
+
+    # --- Konfigurasi Serialisasi JSON ---
+    JSON_BACKEND = 'auto' # 'auto' (orjson bila terpasang), 'orjson' atau 'json'
+    # False: respons biasa tetap di-encode flask-restful (byte identik dengan sebelumnya).
+    # True: di-encode kompak lewat JSON_BACKEND; isi JSON sama, hanya whitespace yang berbeda.
+    JSON_COMPACT_RESPONSES = False
+
+# --- Pool & Routing Primary / Replica ---
+
+REPLICA_BIND_PREFIX = 'replica_'
+READ_PRIMARY_COOKIE = 'db_read_primary'
+
+def engine_options(config, url):
+    """Opsi create_engine dari konfigurasi DB_POOL_*; SQLite (stand-in lokal) hanya memakai pre-ping."""
+    if url.startswith('sqlite'):
+        return {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+
+def replica_binds(config):
+    # Replica didaftarkan sebagai bind Flask-SQLAlchemy; tidak ada model yang terikat ke sana,
+    # jadi create_all tidak menyentuhnya dan hanya RoutingSession yang memilihnya
+    return {
+        f'{REPLICA_BIND_PREFIX}{index}': {'url': url, **engine_options(config, url)}
+        for index, url in enumerate(config['DATABASE_REPLICA_URLS'])
+    }
+
+def reads_from_replica():
+    """GET/HEAD boleh dilayani replica, kecuali client ini baru saja menulis (read-your-writes lewat cookie)."""
+    return (
+        has_request_context()
+        and request.method in ('GET', 'HEAD')
+        and not request.cookies.get(READ_PRIMARY_COOKIE)
+    )
+
+def replica_cache_window():
+    # Setelah commit, invalidasi cache langsung berlaku tetapi replica bisa tertinggal: hasil baca
+    # replica untuk tag yang diinvalidasi dalam jendela ini tidak disimpan. Waktu invalidasi dicatat
+    # di backend cache, jadi dengan cache Redis berlaku untuk pengisi cache di semua worker
+    if db.session.info.get('replica') is None:
+        return 0
+    return current_app.config['REPLICA_STICKY_SECONDS']
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """Session yang mengarahkan baca pada request GET ke replica dan semua tulis ke primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not getattr(clause, 'is_dml', False):
+            replica = self._replica_engine()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_engine(self):
+        # Diputuskan sekali per session (= per request), supaya satu request konsisten di satu replica
+        if 'replica' not in self.info:
+            engines = self._db.engines
+            keys = [key for key in engines if key and key.startswith(REPLICA_BIND_PREFIX)]
+            self.info['replica'] = engines[random.choice(keys)] if keys and reads_from_replica() else None
+        return self.info['replica']
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+# Hook request, route non-resource dan perintah CLI; dipasang ke app di create_app()
+bp = Blueprint('perpustakaan', __name__, cli_group=None)
+
+@event.listens_for(db.session, 'after_flush')
+def _mark_primary_write(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _mark_primary_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def _start_read_your_writes(session):
+    if not session.info.pop('wrote', False) or not current_app.config['DATABASE_REPLICA_URLS']:
+        return
+    if has_request_context():
+        g.wrote_primary = True
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _forget_primary_write(session, previous_transaction):
+    session.info.pop('wrote', None)
+
+@bp.after_app_request
+def _set_read_primary_cookie(response):
+    # Client yang baru menulis membaca dari primary sampai replica sempat menyusul
+    if g.get('wrote_primary'):
+        response.set_cookie(
+            READ_PRIMARY_COOKIE, '1',
+            max_age=max(1, int(current_app.config['REPLICA_STICKY_SECONDS'])),
+            httponly=True, samesite='Lax'
+        )
+    return response
+# Dibuat per app di create_app(); proxy ini menunjuk ke milik app yang sedang aktif
+cache = LocalProxy(lambda: current_app.extensions['perpustakaan_cache'])
+json_backend = LocalProxy(lambda: current_app.extensions['perpustakaan_json'])
+events = LocalProxy(lambda: current_app.extensions['perpustakaan_events'])
+api = Api()
+cors = CORS(expose_headers=['Link', 'X-Next-Cursor', 'ETag', 'Last-Modified'])
+
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    if not current_app.config['JSON_COMPACT_RESPONSES']:
+        return restful_output_json(data, code, headers)
+    return Response(json_backend.dumps(data) + '\n', status=code, headers=headers, mimetype='application/json')
+
+# --- Konfigurasi Paginasi ---
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# --- Instrumentasi Request (metrik Prometheus & profil per request) ---
+
+metrics = Registry()
+REQUEST_LABELS = ('endpoint', 'method')
+http_requests_total = metrics.counter('http_requests_total', 'Jumlah request HTTP.', ('endpoint', 'method', 'status'))
+http_request_duration = metrics.histogram('http_request_duration_seconds', 'Wall time per request.', REQUEST_LABELS)
+http_request_sql_statements = metrics.histogram('http_request_sql_statements', 'Jumlah statement SQL per request.', REQUEST_LABELS, COUNT_BUCKETS)
+http_request_sql_duration = metrics.histogram('http_request_sql_duration_seconds', 'Total waktu SQL per request.', REQUEST_LABELS)
+http_request_serialization = metrics.histogram('http_request_serialization_seconds', 'Total waktu serialisasi baris per request.', REQUEST_LABELS)
+http_response_size = metrics.histogram('http_response_size_bytes', 'Ukuran body respons.', REQUEST_LABELS, SIZE_BUCKETS)
+http_n_plus_one_total = metrics.counter('http_n_plus_one_detected_total', 'Request dengan statement identik berulang (pola N+1).', REQUEST_LABELS)
+
+def _request_profile():
+    return g.get('profile') if has_request_context() else None
+
+def profiling_requested():
+    return current_app.config['PROFILE_REQUESTS_ENABLED'] and (
+        request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'
+    )
+
+def timed_serialization(to_dict):
+    """Akumulasi waktu serialisasi ke profil request; panggilan bersarang (relasi) tidak dihitung dua kali."""
+    @wraps(to_dict)
+    def wrapper(self, *args, **kwargs):
+        profile = _request_profile()
+        if profile is None or profile['serialize_depth']:
+            return to_dict(self, *args, **kwargs)
+        profile['serialize_depth'] += 1
+        started = time.perf_counter()
+        try:
+            return to_dict(self, *args, **kwargs)
+        finally:
+            profile['serialize_time'] += time.perf_counter() - started
+            profile['serialize_depth'] -= 1
+    return wrapper
+
+@timed_serialization
+def serialize_rows(rows, serialize):
+    # Satu pengukuran untuk satu halaman, bukan per baris
+    return [serialize(row) for row in rows]
+
+@bp.before_app_request
+def _start_request_profile():
+    g.profile = {
+        'started': time.perf_counter(),
+        'sql_count': 0,
+        'sql_time': 0.0,
+        'serialize_time': 0.0,
+        'serialize_depth': 0,
+        'statements': Counter()
+    }
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    profile = _request_profile()
+    if profile is not None:
+        profile['sql_count'] += 1
+        profile['sql_time'] += elapsed
+        profile['statements'][statement] += 1
+
+@event.listens_for(Engine, 'handle_error')
+def _discard_cursor_timer(exception_context):
+    started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+@bp.after_app_request
+def _finish_request_profile(response):
+    profile = _request_profile()
+    if profile is None:
+        return response
+    elapsed = time.perf_counter() - profile['started']
+    labels = (request.endpoint or 'unmatched', request.method)
+    size = None if response.is_streamed else response.calculate_content_length()
+    threshold = current_app.config['PROFILE_N_PLUS_ONE_THRESHOLD']
+    repeated = {statement: count for statement, count in profile['statements'].items() if count > threshold}
+
+    http_requests_total.inc(labels + (str(response.status_code),))
+    http_request_duration.observe(labels, elapsed)
+    http_request_sql_statements.observe(labels, profile['sql_count'])
+    http_request_sql_duration.observe(labels, profile['sql_time'])
+    http_request_serialization.observe(labels, profile['serialize_time'])
+    if size is not None:
+        http_response_size.observe(labels, size)
+    if repeated:
+        http_n_plus_one_total.inc(labels)
+
+    if profiling_requested():
+        response.headers['Server-Timing'] = (
+            f"total;dur={elapsed * 1000:.2f}, sql;dur={profile['sql_time'] * 1000:.2f}, "
+            f"serialize;dur={profile['serialize_time'] * 1000:.2f}"
+        )
+        if response.mimetype == 'application/json' and not response.is_streamed and response.status_code != 304:
+            breakdown = {
+                'endpoint': labels[0],
+                'method': labels[1],
+                'wall_time_ms': round(elapsed * 1000, 3),
+                'sql_statements': profile['sql_count'],
+                'sql_time_ms': round(profile['sql_time'] * 1000, 3),
+                'serialization_time_ms': round(profile['serialize_time'] * 1000, 3),
+                'response_size_bytes': size,
+                'n_plus_one': [{'statement': statement, 'count': count} for statement, count in repeated.items()]
+            }
+            body = json.loads(response.get_data() or b'null')
+            response.set_data(json.dumps({'profile': breakdown, 'response': body}))
+            # Body terbungkus bukan representasi resource, jangan sampai divalidasi ulang dengan ETag-nya
+            response.headers.pop('ETag', None)
+            response.headers.pop('Last-Modified', None)
+    return response
 
 # --- Model Database (Pastikan ini ada di bagian ini) ---
 
 class TimestampMixin:
     """Mixin untuk kolom timestamp otomatis."""
     tanggal_dibuat = db.Column(db.DateTime, default=datetime.utcnow)
-    tanggal_diupdate = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Di-index agar MAX(tanggal_diupdate) untuk validator koleksi cukup membaca ujung index.
+    # DATETIME(6) di MySQL: ETag entitas tanpa kolom version (author, category, member) dan
+    # relasi yang di-embed hanya bergantung pada kolom ini, jadi dua update dalam detik yang
+    # sama tidak boleh menghasilkan nilai yang sama
+    tanggal_diupdate = db.Column(
+        db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'),
+        default=datetime.utcnow, onupdate=datetime.utcnow, index=True
+    )
 
 class Author(db.Model, TimestampMixin):
     __tablename__ = 'authors'
@@ -39,6 +348,18 @@ class Author(db.Model, TimestampMixin):
     tanggal_lahir = db.Column(db.Date, nullable=True)
     books = db.relationship('Book', backref='author', lazy=True)
 
+    # Kolom yang boleh dipakai untuk ?sort= pada paginasi keyset
+    SORTABLE = ('id', 'nama', 'tanggal_dibuat')
+    # Skema JSON untuk serializer cepat, urutan key sama dengan to_dict()
+    FIELDS = ('id', 'nama', 'tanggal_lahir', 'tanggal_dibuat', 'tanggal_diupdate')
+
+    __table_args__ = (
+        db.Index('ix_authors_nama_id', 'nama', 'id'),
+        # Index FULLTEXT hanya dibuat di MySQL (dipakai /search)
+        db.Index('ft_authors_nama', 'nama', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
+    @timed_serialization
     def to_dict(self):
         return {
             'id': self.id,
@@ -54,6 +375,14 @@ class Category(db.Model, TimestampMixin):
     nama = db.Column(db.String(50), unique=True, nullable=False)
     books = db.relationship('Book', backref='category', lazy=True)
 
+    SORTABLE = ('id', 'nama')
+    FIELDS = ('id', 'nama', 'tanggal_dibuat', 'tanggal_diupdate')
+
+    __table_args__ = (
+        db.Index('ft_categories_nama', 'nama', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
+    @timed_serialization
     def to_dict(self):
         return {
             'id': self.id,
@@ -71,9 +400,30 @@ class Book(db.Model, TimestampMixin):
     stok = db.Column(db.Integer, default=0, nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey('authors.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
-    borrowings = db.relationship('Borrowing', backref='book', lazy=True)
-
-    def to_dict(self, include_relations=False):
+    version = db.Column(db.Integer, nullable=False, default=1)
+    # passive_deletes: delete buku tidak memuat seluruh riwayat peminjamannya (lihat BookResource.delete)
+    borrowings = db.relationship('Borrowing', backref='book', lazy=True, passive_deletes=True)
+
+    # Optimistic locking: setiap UPDATE/DELETE ORM menyertakan WHERE version = <versi yang dibaca>
+    __mapper_args__ = {'version_id_col': version}
+
+    # Relasi yang boleh di-embed lewat ?expand=
+    EXPANDABLE = ('author', 'category')
+    SORTABLE = ('id', 'judul', 'stok', 'tanggal_dibuat')
+    FIELDS = ('id', 'judul', 'tahun_terbit', 'isbn', 'stok', 'author_id', 'category_id', 'tanggal_dibuat', 'tanggal_diupdate')
+
+    # Index komposit untuk filter + paginasi keyset (kolom filter, lalu id sebagai tiebreaker)
+    __table_args__ = (
+        db.Index('ix_books_author_id_id', 'author_id', 'id'),
+        db.Index('ix_books_category_id_id', 'category_id', 'id'),
+        db.Index('ix_books_tahun_terbit_id', 'tahun_terbit', 'id'),
+        db.Index('ix_books_stok_id', 'stok', 'id'),
+        db.Index('ix_books_tanggal_dibuat_id', 'tanggal_dibuat', 'id'),
+        db.Index('ft_books_judul', 'judul', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
+    @timed_serialization
+    def to_dict(self, expand=()):
         data = {
             'id': self.id,
             'judul': self.judul,
@@ -85,8 +435,9 @@ class Book(db.Model, TimestampMixin):
             'tanggal_dibuat': self.tanggal_dibuat.isoformat(),
             'tanggal_diupdate': self.tanggal_diupdate.isoformat()
         }
-        if include_relations:
+        if 'author' in expand:
             data['author'] = self.author.to_dict() if self.author else None
+        if 'category' in expand:
             data['category'] = self.category.to_dict() if self.category else None
         return data
 
@@ -97,8 +448,18 @@ class Member(db.Model, TimestampMixin):
     alamat = db.Column(db.String(255), nullable=True)
     telepon = db.Column(db.String(20), unique=True, nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=True)
-    borrowings = db.relationship('Borrowing', backref='member', lazy=True)
+    borrowings = db.relationship('Borrowing', backref='member', lazy=True, passive_deletes=True)
+
+    SORTABLE = ('id', 'nama', 'tanggal_dibuat')
+    FIELDS = ('id', 'nama', 'alamat', 'telepon', 'email', ('tanggal_registrasi', 'tanggal_dibuat'), 'tanggal_dibuat', 'tanggal_diupdate')
+
+    __table_args__ = (
+        db.Index('ix_members_nama_id', 'nama', 'id'),
+        db.Index('ix_members_tanggal_dibuat_id', 'tanggal_dibuat', 'id'),
+        db.Index('ft_members_nama', 'nama', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
 
+    @timed_serialization
     def to_dict(self):
         return {
             'id': self.id,
@@ -120,8 +481,31 @@ class Borrowing(db.Model, TimestampMixin):
     tanggal_kembali_seharusnya = db.Column(db.Date, nullable=False)
     tanggal_pengembalian_aktual = db.Column(db.DateTime, nullable=True)
     status = db.Column(db.String(20), default='dipinjam', nullable=False) # 'dipinjam', 'dikembalikan', 'terlambat'
-
-    def to_dict(self, include_relations=False):
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
+
+    EXPANDABLE = ('book', 'member')
+    SORTABLE = ('id', 'tanggal_peminjaman', 'tanggal_kembali_seharusnya')
+    FIELDS = (
+        'id', 'book_id', 'member_id', 'tanggal_peminjaman', 'tanggal_kembali_seharusnya',
+        'tanggal_pengembalian_aktual', 'status', 'tanggal_dibuat', 'tanggal_diupdate'
+    )
+
+    __table_args__ = (
+        db.Index('ix_borrowings_status_id', 'status', 'id'),
+        db.Index('ix_borrowings_member_id_id', 'member_id', 'id'),
+        db.Index('ix_borrowings_book_id_id', 'book_id', 'id'),
+        db.Index('ix_borrowings_tanggal_peminjaman_id', 'tanggal_peminjaman', 'id'),
+        db.Index('ix_borrowings_tanggal_kembali_seharusnya_id', 'tanggal_kembali_seharusnya', 'id'),
+        # Untuk sweeper dan /borrowings/overdue: range scan per status, bukan scan seluruh riwayat
+        db.Index('ix_borrowings_status_tanggal_kembali', 'status', 'tanggal_kembali_seharusnya'),
+        # AUTOINCREMENT di SQLite: id baris yang sudah dipindah ke arsip tidak dipakai ulang
+        {'sqlite_autoincrement': True},
+    )
+
+    @timed_serialization
+    def to_dict(self, expand=()):
         data = {
             'id': self.id,
             'book_id': self.book_id,
@@ -133,17 +517,1199 @@ class Borrowing(db.Model, TimestampMixin):
             'tanggal_dibuat': self.tanggal_dibuat.isoformat(),
             'tanggal_diupdate': self.tanggal_diupdate.isoformat()
         }
-        if include_relations:
+        if 'book' in expand:
             data['book'] = self.book.to_dict() if self.book else None
+        if 'member' in expand:
             data['member'] = self.member.to_dict() if self.member else None
         return data
 
+class ArchivedBorrowing(db.Model):
+    """Peminjaman yang sudah kembali dan melewati masa retensi, dipindah oleh archive_borrowings().
+
+    Ringkas: tanpa status (selalu 'dikembalikan'), version maupun timestamp audit, dan tanpa
+    foreign key agar buku/anggota tetap bisa dihapus. id adalah kunci arsip sendiri; id aslinya
+    disimpan di borrowing_id dan tidak dianggap unik (MySQL < 8.0 bisa memakai ulang id setelah restart).
+    """
+    __tablename__ = 'borrowings_archive'
+    id = db.Column(db.Integer, primary_key=True)
+    borrowing_id = db.Column(db.Integer, nullable=False)
+    book_id = db.Column(db.Integer, nullable=False)
+    member_id = db.Column(db.Integer, nullable=False)
+    tanggal_peminjaman = db.Column(db.DateTime, nullable=False)
+    tanggal_kembali_seharusnya = db.Column(db.Date, nullable=False)
+    tanggal_pengembalian_aktual = db.Column(db.DateTime, nullable=False)
+    tanggal_diarsipkan = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    SORTABLE = Borrowing.SORTABLE
+
+    __table_args__ = (
+        # Paginasi riwayat memakai borrowing_id sebagai tiebreaker, sama seperti id di borrowings
+        db.Index('ix_borrowings_archive_borrowing_id', 'borrowing_id'),
+        # MAX(tanggal_diarsipkan) untuk validator koleksi /borrowings
+        db.Index('ix_borrowings_archive_tanggal_diarsipkan', 'tanggal_diarsipkan'),
+        db.Index('ix_borrowings_archive_member_id_borrowing_id', 'member_id', 'borrowing_id'),
+        db.Index('ix_borrowings_archive_book_id_borrowing_id', 'book_id', 'borrowing_id'),
+        db.Index('ix_borrowings_archive_tanggal_peminjaman_borrowing_id', 'tanggal_peminjaman', 'borrowing_id'),
+        db.Index('ix_borrowings_archive_tanggal_kembali_seharusnya_borrowing_id', 'tanggal_kembali_seharusnya', 'borrowing_id'),
+    )
+
+class Tombstone(db.Model):
+    """Jejak penghapusan entitas, agar feed /changes juga bisa menyinkronkan delete."""
+    __tablename__ = 'tombstones'
+    id = db.Column(db.Integer, primary_key=True)
+    entitas = db.Column(db.String(20), nullable=False) # nama tabel: 'books', 'members', ...
+    entitas_id = db.Column(db.Integer, nullable=False)
+    tanggal_dihapus = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_tombstones_entitas_id', 'entitas', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.entitas_id,
+            'tanggal_dihapus': self.tanggal_dihapus.isoformat()
+        }
+
+def _record_tombstone(mapper, connection, target):
+    # Ditulis di koneksi/transaksi yang sama dengan DELETE-nya
+    connection.execute(insert(Tombstone.__table__).values(
+        entitas=target.__tablename__,
+        entitas_id=target.id,
+        tanggal_dihapus=datetime.utcnow()
+    ))
+
+for _model in (Author, Category, Book, Member, Borrowing):
+    event.listen(_model, 'after_delete', _record_tombstone)
+
+# --- Tabel Ringkasan Statistik (counter inkremental) ---
+
+class StatHarian(db.Model):
+    __tablename__ = 'stat_harian'
+    tanggal = db.Column(db.Date, primary_key=True)
+    jumlah_pinjam = db.Column(db.Integer, default=0, nullable=False)
+    jumlah_kembali = db.Column(db.Integer, default=0, nullable=False)
+
+    def to_dict(self):
+        return {
+            'tanggal': self.tanggal.isoformat(),
+            'jumlah_pinjam': self.jumlah_pinjam,
+            'jumlah_kembali': self.jumlah_kembali
+        }
+
+# Tanpa foreign key: baris statistik boleh tertinggal setelah buku/anggota/kategori dihapus
+class StatBuku(db.Model):
+    __tablename__ = 'stat_buku'
+    book_id = db.Column(db.Integer, primary_key=True)
+    total_pinjam = db.Column(db.Integer, default=0, nullable=False)
+    sedang_dipinjam = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_stat_buku_total_pinjam', 'total_pinjam'),
+    )
+
+class StatAnggota(db.Model):
+    __tablename__ = 'stat_anggota'
+    member_id = db.Column(db.Integer, primary_key=True)
+    total_pinjam = db.Column(db.Integer, default=0, nullable=False)
+    sedang_dipinjam = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_stat_anggota_sedang_dipinjam', 'sedang_dipinjam'),
+    )
+
+class StatKategori(db.Model):
+    __tablename__ = 'stat_kategori'
+    category_id = db.Column(db.Integer, primary_key=True)
+    total_pinjam = db.Column(db.Integer, default=0, nullable=False)
+    sedang_dipinjam = db.Column(db.Integer, default=0, nullable=False)
+
+# --- Utilitas Paginasi Keyset & Filter Query String ---
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, id_positions=(2,)):
+    """Dekode cursor [a, b, c]; posisi di id_positions wajib integer, sisanya skalar/null."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, binascii.Error):
+        abort(400, message='Invalid cursor.')
+    # Cursor buatan client tidak boleh membawa object/array ke query
+    if not isinstance(values, list) or len(values) != 3:
+        abort(400, message='Invalid cursor.')
+    for position, value in enumerate(values):
+        if position in id_positions:
+            valid = type(value) is int
+        else:
+            valid = value is None or isinstance(value, (str, int, float))
+        if not valid:
+            abort(400, message='Invalid cursor.')
+    return values
+
+def _cursor_dump(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _cursor_load(column, value):
+    # Nilai tanggal disimpan di cursor sebagai string ISO, kembalikan ke tipe kolomnya
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        abort(400, message='Invalid cursor.')
+    return value
+
+def int_arg(name):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, message=f'Query parameter {name} must be an integer.')
+
+def date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        abort(400, message=f'Invalid date format for {name}. Use YYYY-MM-DD.')
+
+def bool_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
+def page_limit(default=DEFAULT_PAGE_SIZE):
+    limit = int_arg('limit')
+    if limit is None:
+        return default
+    if limit <= 0 or limit > MAX_PAGE_SIZE:
+        abort(400, message=f'limit must be between 1 and {MAX_PAGE_SIZE}.')
+    return limit
+
+def keyset_query(query, model, id_column=None):
+    """Terapkan urutan (sort column, id) dan posisi ?cursor= pada query.
+
+    Kolom yang boleh dipakai untuk ?sort= dideklarasikan di model.SORTABLE. id_column
+    menggantikan model.id sebagai kolom 'id' (mis. borrowing_id di tabel arsip).
+    Mengembalikan tuple (query, sort_param).
+    """
+    sort_param = request.args.get('sort', 'id')
+    descending = sort_param.startswith('-')
+    sort_key = sort_param.lstrip('-')
+    if sort_key not in model.SORTABLE:
+        abort(400, message=f'Invalid sort field. Must be one of: {", ".join(model.SORTABLE)}.')
+
+    id_column = model.id if id_column is None else id_column
+    column = id_column if sort_key == 'id' else getattr(model, sort_key)
+    cursor = request.args.get('cursor')
+    if cursor:
+        cursor_sort, last_value, last_id = decode_cursor(cursor)
+        if cursor_sort != sort_param:
+            abort(400, message='Cursor does not match the requested sort order.')
+        if sort_key == 'id':
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        else:
+            last_value = _cursor_load(column, last_value)
+            if descending:
+                query = query.filter(or_(column < last_value, and_(column == last_value, id_column < last_id)))
+            else:
+                query = query.filter(or_(column > last_value, and_(column == last_value, id_column > last_id)))
+
+    if sort_key == 'id':
+        order_by = [id_column.desc() if descending else id_column.asc()]
+    elif descending:
+        order_by = [column.desc(), id_column.desc()]
+    else:
+        order_by = [column.asc(), id_column.asc()]
+    return query.order_by(*order_by), sort_param
+
+def keyset_page(query, model):
+    """Ambil satu halaman hasil query dengan paginasi keyset (sort column, id).
+
+    Mengembalikan tuple (rows, next_cursor); next_cursor None jika ini halaman terakhir.
+    """
+    query, sort_param = keyset_query(query, model)
+    limit = page_limit()
+
+    # Ambil satu baris ekstra untuk mengetahui apakah masih ada halaman berikutnya
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([sort_param, _cursor_dump(getattr(last, sort_param.lstrip('-'))), last.id])
+    return rows, next_cursor
+
+# --- Utilitas Pembentukan Query (relasi yang di-embed) ---
+
+def expand_arg(allowed, default=()):
+    """Baca parameter ?expand=a,b dan validasi terhadap relasi yang diizinkan resource."""
+    value = request.args.get('expand')
+    if value is None:
+        return tuple(default)
+    names = tuple(name.strip() for name in value.split(',') if name.strip())
+    invalid = [name for name in names if name not in allowed]
+    if invalid:
+        abort(400, message=f'Invalid expand value. Must be any of: {", ".join(allowed)}.')
+    return names
+
+def with_relations(query, model, expand, loader=selectinload):
+    # selectinload untuk list (1 query tambahan per relasi, bukan per baris),
+    # joinedload untuk detail (satu round trip)
+    return query.options(*[loader(getattr(model, name)) for name in expand])
+
+def reload_with_relations(model, obj_id, expand):
+    # Setelah commit objek sudah expired; muat ulang sekaligus dengan relasinya
+    # daripada membiarkan setiap atribut relasi memicu lazy load terpisah.
+    return db.session.get(
+        model, obj_id,
+        options=[joinedload(getattr(model, name)) for name in expand],
+        populate_existing=True
+    )
+
+def page_headers(next_cursor):
+    if not next_cursor:
+        return {}
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    next_url = f"{request.base_url}?{urlencode(args)}"
+    return {'Link': f'<{next_url}>; rel="next"', 'X-Next-Cursor': next_cursor}
+
+# --- Respons Streaming (NDJSON / JSON array chunked) ---
+
+STREAM_YIELD_PER = 1000
+
+def stream_format():
+    """'ndjson' untuk Accept: application/x-ndjson, 'array' untuk ?stream=1, selain itu None."""
+    best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    if best == 'application/x-ndjson':
+        return 'ndjson'
+    if bool_arg('stream'):
+        return 'array'
+    return None
+
+def stream_response(query, serialize, fmt):
+    """Kirim hasil query baris per baris tanpa menampung seluruh list/JSON di memori.
+
+    yield_per memakai server-side cursor (stream_results), sehingga driver juga
+    tidak mem-buffer seluruh result set. Accept: application/x-ndjson menghasilkan
+    satu objek JSON per baris; ?stream=1 menghasilkan JSON array yang dikirim chunked.
+    """
+    rows = query.yield_per(STREAM_YIELD_PER)
+
+    def generate_ndjson():
+        for row in rows:
+            yield json_backend.dumps(serialize(row)) + '\n'
+
+    def generate_array():
+        yield '['
+        first = True
+        for row in rows:
+            chunk = json_backend.dumps(serialize(row))
+            yield chunk if first else ',' + chunk
+            first = False
+        yield ']\n'
+
+    if fmt == 'ndjson':
+        return Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+    return Response(stream_with_context(generate_array()), mimetype='application/json')
+
+def list_response(query, model, serialize=None, expand=()):
+    """Respons standar endpoint list: satu halaman keyset, atau streaming seluruh hasil.
+
+    Tanpa `serialize`, baris dibaca sebagai proyeksi kolom dan dibentuk oleh serializer
+    terkompilasi (model.FIELDS), dengan relasi di `expand` ikut di-JOIN. Jika `serialize`
+    diberikan, baris dimuat sebagai instance ORM dan relasinya lewat selectinload.
+    Untuk respons halaman, validator koleksi dihitung lebih dulu sehingga
+    If-None-Match/If-Modified-Since yang cocok langsung dijawab 304 tanpa memuat baris.
+    """
+    if serialize is None:
+        serializer = compile_serializer(model, expand)
+        rows_query, serialize = serializer.project(query), serializer.serialize
+    else:
+        rows_query = with_relations(query, model, expand)
+    fmt = stream_format()
+    if fmt:
+        rows_query, _ = keyset_query(rows_query, model)
+        if request.args.get('limit'):
+            rows_query = rows_query.limit(page_limit())
+        return stream_response(rows_query, serialize, fmt)
+    token, last_modified = collection_validators(query, model, expand)
+    headers = validator_headers(token, last_modified)
+    if is_not_modified(token, last_modified):
+        return not_modified_response(headers)
+    rows, next_cursor = keyset_page(rows_query, model)
+    headers.update(page_headers(next_cursor))
+    return serialize_rows(rows, serialize), 200, headers
+
+# --- HTTP Conditional Request (ETag / Last-Modified) ---
+
+def _etag_token(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:20]
+
+def validator_headers(token, last_modified):
+    # no-cache: browser boleh menyimpan respons tetapi wajib revalidasi (yang lalu dijawab 304)
+    headers = {'ETag': quote_etag(token, weak=True), 'Cache-Control': 'no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified.replace(tzinfo=timezone.utc))
+    return headers
+
+def is_not_modified(token, last_modified):
+    """Evaluasi If-None-Match (prioritas) lalu If-Modified-Since terhadap validator saat ini."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(token)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= request.if_modified_since
+    return False
+
+def not_modified_response(headers):
+    return Response(status=304, headers=headers)
+
+def entity_validators(obj, expand=()):
+    """Token ETag dan Last-Modified satu entitas beserta relasi yang di-embed, tanpa serialisasi."""
+    parts = [obj.__tablename__, obj.id, getattr(obj, 'version', ''), obj.tanggal_diupdate.isoformat()]
+    last_modified = obj.tanggal_diupdate
+    for name in expand:
+        related = getattr(obj, name)
+        if related is not None:
+            parts += [name, related.id, related.tanggal_diupdate.isoformat()]
+            last_modified = max(last_modified, related.tanggal_diupdate)
+    return _etag_token(*parts), last_modified
+
+def entity_response(obj, expand=()):
+    token, last_modified = entity_validators(obj, expand)
+    headers = validator_headers(token, last_modified)
+    if is_not_modified(token, last_modified):
+        return not_modified_response(headers)
+    return (obj.to_dict(expand) if expand else obj.to_dict()), 200, headers
+
+def collection_validators(query, model, expand=()):
+    """Validator koleksi dari MAX(tanggal_diupdate) + COUNT(*), dihitung di database tanpa memuat
+    baris. Relasi yang di-embed ikut dihitung MAX-nya, begitu juga penghapusan terakhir di tabel ini."""
+    last_modified, count = query.order_by(None).with_entities(func.max(model.tanggal_diupdate), func.count(model.id)).one()
+    parts = [model.__tablename__, request.query_string.decode('utf-8'), last_modified, count]
+    # DELETE tidak menggeser MAX(tanggal_diupdate): tombstone terakhir (index entitas, id) ikut dihitung
+    for removed_at in latest_removals(model):
+        parts.append(removed_at)
+        if last_modified is None or removed_at > last_modified:
+            last_modified = removed_at
+    for name in expand:
+        related_model = getattr(model, name).property.mapper.class_
+        related_max = db.session.query(func.max(related_model.tanggal_diupdate)).scalar()
+        parts.append(related_max)
+        if related_max is not None and (last_modified is None or related_max > last_modified):
+            last_modified = related_max
+    return _etag_token(*parts), last_modified
+
+def latest_removals(model):
+    """Waktu baris terakhir dikeluarkan dari tabel model (bukan lewat UPDATE)."""
+    removed_at = (
+        db.session.query(Tombstone.tanggal_dihapus)
+        .filter(Tombstone.entitas == model.__tablename__)
+        .order_by(Tombstone.id.desc())
+        .limit(1)
+        .scalar()
+    )
+    removals = [removed_at] if removed_at is not None else []
+    if model is Borrowing:
+        # Baris yang dipindah ke arsip juga keluar dari /borrowings, tanpa tombstone
+        archived_at = db.session.query(func.max(ArchivedBorrowing.tanggal_diarsipkan)).scalar()
+        if archived_at is not None:
+            removals.append(archived_at)
+    return removals
+
+def check_if_match(obj, expand=()):
+    # If-Match pada PUT/DELETE: tolak jika entitas sudah berubah sejak client membacanya (perbandingan weak)
+    if request.if_match:
+        token, _ = entity_validators(obj, expand)
+        if not request.if_match.contains_weak(token):
+            abort(412, message='Precondition failed: the resource has been modified.')
+
+# --- Cache Baca Katalog ---
+
+def cache_key():
+    # ?profile=1 hanya membungkus respons di after_request, jadi tetap memakai entri cache yang sama
+    args = urlencode(sorted((key, value) for key, value in request.args.items(multi=True) if key != 'profile'))
+    return f'{request.base_url}?{args}'
+
+def payload_tags(body, entity=None):
+    # Tag untuk entitas yang di-embed (mis. book['category']), agar invalidasi kategori ikut menghapus payload buku.
+    # Dengan `entity`, setiap baris list juga diberi tag miliknya sendiri (mis. 'book:5')
+    tags = set()
+    for item in body if isinstance(body, list) else [body]:
+        if entity:
+            tags.add(f"{entity}:{item['id']}")
+        for relation in ('author', 'category', 'book', 'member'):
+            embedded = item.get(relation)
+            if isinstance(embedded, dict):
+                tags.add(f"{relation}:{embedded['id']}")
+    return tags
+
+def cached_response(tags, compute, entity=None):
+    """Layani GET lewat cache baca; compute() hanya dipanggil saat miss.
+
+    `tags` adalah tag milik payload ini (mis. ['book:5'] atau ['books']); tag untuk
+    relasi yang di-embed ditambahkan otomatis, begitu juga tag per baris list jika
+    `entity` diberikan. Respons streaming tidak di-cache.
+    """
+    if stream_format():
+        return compute()
+    key = cache_key()
+    hit = cache.get(key)
+    if hit is not None:
+        etag = hit['headers'].get('ETag')
+        if etag and is_not_modified(unquote_etag(etag)[0], parse_date(hit['headers'].get('Last-Modified'))):
+            return not_modified_response(hit['headers'])
+        return hit['body'], 200, hit['headers']
+    # Generasi diambil sebelum membaca: jika ada tag payload yang diinvalidasi selama compute(),
+    # hasil bacaan ini mungkin sudah basi dan tidak disimpan
+    generation = cache.generation()
+    result = compute()
+    if isinstance(result, Response):
+        return result
+    body, status, headers = result if len(result) == 3 else (result[0], result[1], {})
+    if status == 200:
+        tags = set(tags) | payload_tags(body, entity)
+        if not cache.invalidated_since(tags, generation, replica_cache_window()):
+            cache.set(key, {'body': body, 'headers': headers}, tags)
+    return body, status, headers
+
+def cache_invalidate(*tags):
+    # Invalidasi ditunda sampai commit berhasil, supaya request lain tidak sempat
+    # meng-cache ulang data lama di antara invalidasi dan commit
+    db.session.info.setdefault('cache_tags', set()).update(tags)
+
+@event.listens_for(db.session, 'after_commit')
+def _flush_cache_invalidations(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        cache.invalidate_tags(tags)
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_cache_invalidations(session, previous_transaction):
+    session.info.pop('cache_tags', None)
+
+# --- Live Update (Server-Sent Events) ---
+
+def publish_event(event_type, data):
+    # Seperti invalidasi cache: event baru dikirim ke broker setelah commit berhasil,
+    # dan dibuang jika transaksinya rollback (mis. saat retry_on_conflict)
+    db.session.info.setdefault('events', []).append((event_type, data))
+
+@event.listens_for(db.session, 'after_commit')
+def _flush_events(session):
+    for event_type, data in session.info.pop('events', ()):
+        events.publish(event_type, data)
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_events(session, previous_transaction):
+    session.info.pop('events', None)
+
+def last_event_id():
+    # Tidak divalidasi di sini: id yang tidak dikenali broker (format lama, worker lain) berujung
+    # 'resync', bukan 400 yang membuat EventSource berhenti menyambung ulang
+    return (request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or '').strip() or None
+
+@bp.route('/events')
+def event_stream():
+    """Stream SSE perubahan stok, peminjaman dan anggota, agar terminal tidak perlu polling.
+
+    Tidak memakai stream_with_context: generator tidak menyentuh database, jadi koneksi
+    yang terbuka lama tidak menahan app context maupun koneksi pool.
+    """
+    subscription = events.subscribe(last_event_id())
+    keepalive = current_app.config['EVENTS_KEEPALIVE']
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                event = subscription.get(timeout=keepalive)
+                yield ': keepalive\n\n' if event is None else event['frame']
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# --- Pencarian (FULLTEXT MySQL, fallback LIKE untuk dialek lain) ---
+
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+# Bobot skor: kecocokan di judul lebih penting daripada di nama penulis/kategori
+SEARCH_WEIGHTS = {'judul': 3.0, 'author': 1.5, 'category': 1.0}
+ISBN_PATTERN = re.compile(r'^[0-9Xx-]{3,20}$')
+
+def search_terms(q):
+    # Buang operator boolean FULLTEXT (+ - < > ( ) ~ * " @) dari input pengguna
+    return [term for term in re.split(r'[^\w]+', q.lower()) if term]
+
+def _uses_fulltext():
+    return db.session.get_bind().dialect.name == 'mysql'
+
+def text_match(column, terms):
+    """Ekspresi (filter, skor) untuk pencarian prefix semua term pada kolom.
+
+    MySQL: MATCH ... AGAINST ('+term1* +term2*' IN BOOLEAN MODE) memakai index FULLTEXT.
+    Dialek lain (mis. SQLite saat development): LIKE per term, skor dihitung di Python.
+    """
+    if _uses_fulltext():
+        score = mysql_match(column, against=' '.join(f'+{term}*' for term in terms)).in_boolean_mode()
+        return score > 0, score
+    return and_(*[column.icontains(term, autoescape=True) for term in terms]), None
+
+def _like_score(value, terms):
+    value = (value or '').lower()
+    words = re.split(r'[^\w]+', value)
+    score = 0.0
+    for term in terms:
+        if term in words:
+            score += 2.0
+        elif any(word.startswith(term) for word in words):
+            score += 1.0
+        elif term in value:
+            score += 0.5
+    return score
+
+def search_books(q, limit):
+    scores = {}
+    books = {}
+
+    # ISBN: exact lalu prefix, lewat index unik isbn (range scan B-tree)
+    if ISBN_PATTERN.match(q.strip()):
+        isbn = q.strip()
+        for book in Book.query.filter(Book.isbn.startswith(isbn, autoescape=True)).order_by(Book.isbn).limit(limit):
+            books[book.id] = book
+            scores[book.id] = 10.0 if book.isbn == isbn else 5.0
+
+    terms = search_terms(q)
+    if terms:
+        condition, score = text_match(Book.judul, terms)
+        query = Book.query.filter(condition)
+        if score is not None:
+            for book, value in query.add_columns(score).order_by(score.desc()).limit(limit):
+                books[book.id] = book
+                scores[book.id] = scores.get(book.id, 0) + SEARCH_WEIGHTS['judul'] * float(value)
+        else:
+            for book in query.limit(limit):
+                books[book.id] = book
+                scores[book.id] = scores.get(book.id, 0) + SEARCH_WEIGHTS['judul'] * _like_score(book.judul, terms)
+
+        # Penulis/kategori yang cocok (tabel kecil), lalu bukunya lewat index (author_id, id)/(category_id, id)
+        for relation, model, fk in (('author', Author, Book.author_id), ('category', Category, Book.category_id)):
+            condition, score = text_match(model.nama, terms)
+            matches = db.session.query(model.id, score if score is not None else model.nama).filter(condition).limit(limit).all()
+            relation_scores = {
+                row_id: float(value) if score is not None else _like_score(value, terms)
+                for row_id, value in matches
+            }
+            if not relation_scores:
+                continue
+            for book in Book.query.filter(fk.in_(relation_scores)).limit(limit):
+                books[book.id] = book
+                scores[book.id] = scores.get(book.id, 0) + SEARCH_WEIGHTS[relation] * relation_scores[getattr(book, fk.key)]
+
+    ranked = sorted(books, key=lambda book_id: (-scores[book_id], book_id))[:limit]
+    return [dict(books[book_id].to_dict(), score=round(scores[book_id], 4)) for book_id in ranked]
+
+def search_members(q, limit):
+    scores = {}
+    members = {}
+    value = q.strip()
+
+    # Telepon & email: prefix lewat index unik masing-masing kolom
+    for column in (Member.telepon, Member.email):
+        for member in Member.query.filter(column.startswith(value, autoescape=True)).order_by(column).limit(limit):
+            members[member.id] = member
+            scores[member.id] = max(scores.get(member.id, 0), 10.0 if getattr(member, column.key) == value else 5.0)
+
+    terms = search_terms(q)
+    if terms:
+        condition, score = text_match(Member.nama, terms)
+        query = Member.query.filter(condition)
+        if score is not None:
+            rows = [(member, float(value)) for member, value in query.add_columns(score).order_by(score.desc()).limit(limit)]
+        else:
+            rows = [(member, _like_score(member.nama, terms)) for member in query.limit(limit)]
+        for member, member_score in rows:
+            members[member.id] = member
+            scores[member.id] = scores.get(member.id, 0) + member_score
+
+    ranked = sorted(members, key=lambda member_id: (-scores[member_id], member_id))[:limit]
+    return [dict(members[member_id].to_dict(), score=round(scores[member_id], 4)) for member_id in ranked]
+
+# --- Akuntansi Stok Atomik & Retry Transaksi ---
+
+TRANSACTION_RETRY_ATTEMPTS = 3
+TRANSACTION_RETRY_BACKOFF = 0.05 # detik, dikalikan nomor percobaan + jitter
+# MySQL: 1213 deadlock, 1205 lock wait timeout. SQLSTATE 40001/40P01: serialization failure/deadlock.
+RETRYABLE_ERROR_CODES = (1213, 1205)
+RETRYABLE_SQLSTATES = ('40001', '40P01')
+
+def adjust_stock(book_id, delta):
+    """Ubah stok buku dengan satu UPDATE bersyarat, tanpa read-modify-write di Python.
+
+    Pengurangan hanya berhasil jika stok mencukupi (stok + delta >= 0). Versi buku ikut
+    dinaikkan agar update ORM yang membaca stok lama terdeteksi oleh version_id_col.
+    Mengembalikan True jika tepat satu baris berubah.
+    """
+    stmt = update(Book).where(Book.id == book_id)
+    if delta < 0:
+        stmt = stmt.where(Book.stok >= -delta)
+    stmt = stmt.values(stok=Book.stok + delta, version=Book.version + 1)
+    return _execute_stock_update(stmt, [book_id])
+
+def adjust_stock_many(deltas):
+    """Versi set-based adjust_stock: stok banyak buku diubah dengan satu UPDATE ... CASE id.
+
+    deltas: dict book_id -> perubahan stok. Mengembalikan True hanya jika setiap buku
+    berubah, yaitu semua buku ada dan stoknya cukup untuk setiap pengurangan.
+    """
+    deltas = {book_id: delta for book_id, delta in deltas.items() if delta}
+    if not deltas:
+        return True
+    change = case(deltas, value=Book.id)
+    stmt = (
+        update(Book)
+        .where(Book.id.in_(list(deltas)), Book.stok + change >= 0)
+        .values(stok=Book.stok + change, version=Book.version + 1)
+    )
+    return _execute_stock_update(stmt, list(deltas))
+
+def _execute_stock_update(stmt, book_ids):
+    """Jalankan UPDATE stok; True jika semua buku berubah. Stok baru diumumkan lewat event 'book.stock'.
+
+    Nilai stok + version dibaca dengan RETURNING jika dialek mendukung (SQLite, PostgreSQL),
+    selain itu dengan satu SELECT di transaksi yang sama; barisnya masih terkunci oleh UPDATE
+    ini, jadi nilainya pasti milik transaksi ini. version dipakai client untuk mengabaikan
+    event yang tiba tidak berurutan.
+    """
+    # Hanya payload yang memuat buku ini dan list yang isinya/urutannya bergantung pada stok;
+    # halaman /books lain tetap di cache (tag 'books' hanya untuk insert/delete)
+    cache_invalidate(*[f'book:{book_id}' for book_id in book_ids], 'books:stok')
+    stmt = stmt.execution_options(synchronize_session=False)
+    if db.session.get_bind().dialect.update_returning:
+        rows = db.session.execute(stmt.returning(Book.id, Book.stok, Book.version)).all()
+    else:
+        if db.session.execute(stmt).rowcount != len(book_ids):
+            return False
+        rows = db.session.query(Book.id, Book.stok, Book.version).filter(Book.id.in_(book_ids)).all()
+    for book_id, stok, version in rows:
+        publish_event('book.stock', {'id': book_id, 'stok': stok, 'version': version})
+    return len(rows) == len(book_ids)
+
+def is_retryable_error(error):
+    if isinstance(error, StaleDataError):
+        return True
+    orig = getattr(error, 'orig', None)
+    if orig is None:
+        return False
+    code = orig.args[0] if orig.args else None
+    sqlstate = getattr(orig, 'sqlstate', None) or getattr(orig, 'pgcode', None)
+    return code in RETRYABLE_ERROR_CODES or sqlstate in RETRYABLE_SQLSTATES
+
+CONFLICT_MESSAGE = 'Conflicting concurrent update. Please retry.'
+
+def retry_pause(attempt):
+    time.sleep(TRANSACTION_RETRY_BACKOFF * attempt * (1 + random.random()))
+
+def retry_on_conflict(handler):
+    """Jalankan ulang handler mutasi saat deadlock, lock timeout, serialization failure
+    atau konflik versi optimistik; setelah percobaan habis kembalikan 409.
+
+    Hanya untuk handler dengan satu commit: handler yang commit bertahap (bulk best_effort)
+    mengulang per chunk di bulk_write agar chunk yang sudah commit tidak ditulis dua kali.
+    """
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        for attempt in range(1, TRANSACTION_RETRY_ATTEMPTS + 1):
+            try:
+                return handler(*args, **kwargs)
+            except (DBAPIError, StaleDataError) as e:
+                db.session.rollback()
+                if not is_retryable_error(e):
+                    raise
+                if attempt == TRANSACTION_RETRY_ATTEMPTS:
+                    return {'message': CONFLICT_MESSAGE}, 409
+                retry_pause(attempt)
+    return wrapper
+
+# --- Utilitas Bulk Import ---
+
+BULK_CHUNK_SIZE = 500
+BULK_MAX_CHUNK_SIZE = 5000
+BULK_MAX_ROWS = 100000
+IN_CLAUSE_CHUNK = 1000
+
+def batch_mode():
+    # 'atomic' = semua atau tidak sama sekali, 'best_effort' = tulis yang valid dan laporkan yang gagal
+    mode = request.args.get('mode', 'atomic')
+    if mode not in ('atomic', 'best_effort'):
+        abort(400, message='Invalid mode. Must be "atomic" or "best_effort".')
+    return mode
+
+def bulk_options():
+    mode = batch_mode()
+    chunk_size = int_arg('chunk_size') or BULK_CHUNK_SIZE
+    if chunk_size <= 0 or chunk_size > BULK_MAX_CHUNK_SIZE:
+        abort(400, message=f'chunk_size must be between 1 and {BULK_MAX_CHUNK_SIZE}.')
+    return mode, chunk_size
+
+def parse_bulk_payload():
+    """Baca body bulk sebagai JSON array, NDJSON (application/x-ndjson) atau CSV (text/csv)."""
+    if request.mimetype == 'text/csv':
+        reader = csv.DictReader(io.StringIO(request.get_data(as_text=True)))
+        rows = [
+            {key.strip(): (value if value != '' else None) for key, value in row.items() if key}
+            for row in reader
+        ]
+    elif request.mimetype == 'application/x-ndjson':
+        try:
+            rows = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        except ValueError:
+            abort(400, message='Invalid NDJSON body.')
+    else:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            abort(400, message='Request body must be a JSON array, NDJSON or CSV.')
+    if not rows:
+        abort(400, message='No rows provided.')
+    if len(rows) > BULK_MAX_ROWS:
+        abort(400, message=f'Too many rows. Maximum is {BULK_MAX_ROWS} per request.')
+    return rows
+
+def clean_bulk_row(row, fields, required):
+    """Normalisasi satu baris bulk: cek field wajib dan konversi ke int (nilai CSV berupa string).
+
+    fields memetakan nama field ke tipe (int atau str). Melempar ValueError berisi pesan untuk laporan per baris.
+    """
+    if not isinstance(row, dict):
+        raise ValueError('Row must be an object.')
+    if any(row.get(field) in (None, '') for field in required):
+        raise ValueError(f'Required fields are: {", ".join(required)}')
+    clean = {}
+    for field, field_type in fields.items():
+        value = row.get(field)
+        if value in (None, ''):
+            clean[field] = None
+        elif field_type is int:
+            try:
+                clean[field] = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'{field} must be an integer.')
+        else:
+            clean[field] = str(value)
+    return clean
+
+def existing_values(column, values):
+    """Nilai dari `values` yang sudah ada di kolom, dengan satu IN (...) per potongan IN_CLAUSE_CHUNK nilai."""
+    values = list({value for value in values if value is not None})
+    found = set()
+    for start in range(0, len(values), IN_CLAUSE_CHUNK):
+        batch = values[start:start + IN_CLAUSE_CHUNK]
+        found.update(value for (value,) in db.session.query(column).filter(column.in_(batch)))
+    return found
+
+def _insert_chunk(model, rows, need_ids=False):
+    # INSERT multi-baris (executemany); id dikembalikan lewat RETURNING jika dialek mendukungnya.
+    # need_ids di dialek tanpa RETURNING (MySQL): satu INSERT per baris, id dari lastrowid
+    dialect = db.session.get_bind().dialect
+    if getattr(dialect, 'insert_executemany_returning_sort_by_parameter_order', False):
+        result = db.session.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+        return [row_id for (row_id,) in result]
+    if need_ids:
+        # Insert Core pada tabel (bukan entitas ORM): hasilnya CursorResult dengan inserted_primary_key
+        return [db.session.execute(insert(model.__table__), row).inserted_primary_key[0] for row in rows]
+    db.session.execute(insert(model), rows)
+    return None
+
+def bulk_write(model, valid, errors, total, mode, chunk_size, natural_key=None, before_chunk=None):
+    """Tulis baris valid per chunk dan susun laporan per baris.
+
+    valid: list (index, row) yang lolos validasi; errors: dict index -> pesan.
+    Mode 'atomic' menulis semua dalam satu transaksi dan tidak menulis apa pun jika ada
+    baris yang gagal; mode 'best_effort' commit per chunk dan melaporkan baris yang gagal.
+    before_chunk(chunk) dipanggil di transaksi yang sama sebelum INSERT (mis. pengurangan stok)
+    dan boleh melempar ValueError untuk menggagalkan chunk tersebut.
+
+    Deadlock/lock timeout di mode 'best_effort' diulang per chunk (chunk sebelumnya sudah
+    commit); jika percobaan habis, baris chunk itu dilaporkan gagal. Di mode 'atomic' error
+    diteruskan ke pemanggil, yang boleh mengulang seluruh request lewat retry_on_conflict.
+    """
+    ids = {}
+    if not (mode == 'atomic' and errors):
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            for attempt in range(1, TRANSACTION_RETRY_ATTEMPTS + 1):
+                try:
+                    # Tag koleksi sama dengan nama tabel ('books', 'members', ...)
+                    cache_invalidate(model.__tablename__)
+                    if before_chunk:
+                        before_chunk(chunk)
+                    chunk_ids = _insert_chunk(model, [row for _, row in chunk])
+                    if chunk_ids is not None:
+                        ids.update(zip((index for index, _ in chunk), chunk_ids))
+                    # Event ringkas per chunk ('books.imported', ...): terminal memuat ulang tabelnya
+                    publish_event(f'{model.__tablename__}.imported', {'count': len(chunk)})
+                    if mode == 'best_effort':
+                        db.session.commit()
+                    break
+                except (IntegrityError, ValueError) as e:
+                    db.session.rollback()
+                    message = str(e) if isinstance(e, ValueError) else 'Database rejected this chunk (constraint violation).'
+                    if mode == 'atomic':
+                        return {'message': message, 'mode': mode, 'total': total, 'created': 0, 'failed': total}, 409
+                    for index, _ in chunk:
+                        errors[index] = message
+                    break
+                except (DBAPIError, StaleDataError) as e:
+                    if mode == 'atomic' or not is_retryable_error(e):
+                        raise
+                    db.session.rollback()
+                    if attempt == TRANSACTION_RETRY_ATTEMPTS:
+                        for index, _ in chunk:
+                            errors[index] = CONFLICT_MESSAGE
+                    else:
+                        retry_pause(attempt)
+        if mode == 'atomic':
+            db.session.commit()
+
+    written = [(index, row) for index, row in valid if index not in errors]
+    if written and not ids and natural_key and not (mode == 'atomic' and errors):
+        key_column = getattr(model, natural_key)
+        by_key = {}
+        keys = [row[natural_key] for _, row in written]
+        for start in range(0, len(keys), IN_CLAUSE_CHUNK):
+            batch = keys[start:start + IN_CLAUSE_CHUNK]
+            by_key.update((key, row_id) for row_id, key in db.session.query(model.id, key_column).filter(key_column.in_(batch)))
+        ids = {index: by_key.get(row[natural_key]) for index, row in written}
+
+    results = []
+    for index in range(total):
+        if index in errors:
+            results.append({'index': index, 'status': 'error', 'message': errors[index]})
+        elif mode == 'atomic' and errors:
+            results.append({'index': index, 'status': 'skipped'})
+        else:
+            results.append({'index': index, 'status': 'created', 'id': ids.get(index)})
+    created = sum(1 for result in results if result['status'] == 'created')
+    report = {'mode': mode, 'total': total, 'created': created, 'failed': len(errors), 'results': results}
+    if not errors:
+        return report, 201
+    return report, 207 if created else 400
+
+# --- Pencatatan Statistik Sirkulasi ---
+
+def _bump(model, key, **deltas):
+    """Upsert counter: INSERT baris baru atau tambahkan delta ke baris yang ada, dalam satu statement."""
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if deltas:
+        _bump_many(model, list(key), [{**key, **deltas}])
+
+def _bump_many(model, key_columns, rows):
+    """Versi multi-baris _bump: semua counter satu tabel di-upsert dalam satu INSERT ... VALUES (...), (...).
+
+    rows: list dict berisi kolom key + delta, dengan himpunan kolom yang sama di setiap baris.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    columns = [column for column in rows[0] if column not in key_columns]
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        stmt = mysql_insert(table).values(rows)
+        stmt = stmt.on_duplicate_key_update({column: table.c[column] + stmt.inserted[column] for column in columns})
+    else:
+        insert_factory = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+        stmt = insert_factory(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={column: table.c[column] + stmt.excluded[column] for column in columns}
+        )
+    db.session.execute(stmt)
+
+def _category_ids(book_ids):
+    return dict(db.session.query(Book.id, Book.category_id).filter(Book.id.in_(set(book_ids))))
+
+def stats_record_loans(loans, sign=1):
+    """Catat peminjaman baru (sign=1) atau hapus jejaknya (sign=-1) di tabel ringkasan.
+
+    loans: list tuple (book_id, member_id, tanggal_peminjaman). Dipanggil di transaksi
+    yang sama dengan INSERT/DELETE peminjaman, jadi counter ikut rollback jika gagal.
+    """
+    if not loans:
+        return
+    categories = _category_ids(book_id for book_id, _, _ in loans)
+    days = Counter(tanggal.date() for _, _, tanggal in loans)
+    _bump_many(StatHarian, ['tanggal'], [{'tanggal': day, 'jumlah_pinjam': sign * count} for day, count in days.items()])
+    for model, key, counts in (
+        (StatBuku, 'book_id', Counter(book_id for book_id, _, _ in loans)),
+        (StatAnggota, 'member_id', Counter(member_id for _, member_id, _ in loans)),
+        (StatKategori, 'category_id', Counter(categories[book_id] for book_id, _, _ in loans if book_id in categories))
+    ):
+        _bump_many(model, [key], [
+            {key: value, 'total_pinjam': sign * count, 'sedang_dipinjam': sign * count}
+            for value, count in counts.items()
+        ])
+
+def stats_record_return(book_id, member_id, tanggal_pengembalian, sign=1):
+    """Catat pengembalian (sign=1) atau hapus jejaknya saat record yang sudah kembali dihapus (sign=-1)."""
+    stats_record_returns([(book_id, member_id, tanggal_pengembalian)], sign)
+
+def stats_record_returns(returns, sign=1):
+    """Versi batch stats_record_return; returns: list tuple (book_id, member_id, tanggal_pengembalian)."""
+    if not returns:
+        return
+    categories = _category_ids(book_id for book_id, _, _ in returns)
+    days = Counter(tanggal.date() for _, _, tanggal in returns)
+    _bump_many(StatHarian, ['tanggal'], [{'tanggal': day, 'jumlah_kembali': sign * count} for day, count in days.items()])
+    for model, key, counts in (
+        (StatBuku, 'book_id', Counter(book_id for book_id, _, _ in returns)),
+        (StatAnggota, 'member_id', Counter(member_id for _, member_id, _ in returns)),
+        (StatKategori, 'category_id', Counter(categories[book_id] for book_id, _, _ in returns if book_id in categories))
+    ):
+        _bump_many(model, [key], [{key: value, 'sedang_dipinjam': -sign * count} for value, count in counts.items()])
+
+def stats_move_book_category(book_id, old_category_id, new_category_id):
+    """Pindahkan counter satu buku dari kategori lama ke kategori barunya.
+
+    stat_kategori dikelompokkan per kategori buku saat ini (sama seperti rebuild_stats), jadi
+    total & peminjaman aktif buku ikut pindah. new_category_id None berarti buku dihapus: riwayatnya
+    (di arsip) tidak lagi punya kategori, jadi counter-nya hanya dikurangkan. Dipanggil setelah
+    UPDATE/DELETE buku di-flush: baris buku sudah terkunci sehingga peminjaman/pengembalian
+    bersamaan menunggu dan membaca kategori baru.
+    """
+    if old_category_id == new_category_id:
+        return
+    counts = (
+        db.session.query(StatBuku.total_pinjam, StatBuku.sedang_dipinjam)
+        .filter(StatBuku.book_id == book_id)
+        .with_for_update()
+        .first()
+    )
+    if counts is None:
+        return
+    total, active = counts
+    rows = [{'category_id': old_category_id, 'total_pinjam': -total, 'sedang_dipinjam': -active}]
+    if new_category_id is not None:
+        rows.append({'category_id': new_category_id, 'total_pinjam': total, 'sedang_dipinjam': active})
+    _bump_many(StatKategori, ['category_id'], rows)
+
+def all_loans():
+    """Subquery peminjaman di tabel aktif dan arsip, dengan kolom yang dibutuhkan statistik."""
+    columns = ('book_id', 'member_id', 'tanggal_peminjaman', 'tanggal_pengembalian_aktual')
+    return union_all(
+        select(*[getattr(Borrowing, column) for column in columns]),
+        select(*[getattr(ArchivedBorrowing, column) for column in columns])
+    ).subquery('loans')
+
+def rebuild_stats():
+    """Hitung ulang seluruh tabel ringkasan dari tabel borrowings + arsipnya dalam satu transaksi."""
+    for model in (StatHarian, StatBuku, StatAnggota, StatKategori):
+        db.session.query(model).delete()
+
+    loans = all_loans()
+    active = func.sum(case((loans.c.tanggal_pengembalian_aktual.is_(None), 1), else_=0))
+    days = {}
+    loan_day = func.date(loans.c.tanggal_peminjaman)
+    for day, count in db.session.query(loan_day, func.count()).group_by(loan_day):
+        days.setdefault(str(day), {'jumlah_pinjam': 0, 'jumlah_kembali': 0})['jumlah_pinjam'] = count
+    returned_day = func.date(loans.c.tanggal_pengembalian_aktual)
+    for day, count in db.session.query(returned_day, func.count()).filter(loans.c.tanggal_pengembalian_aktual.isnot(None)).group_by(returned_day):
+        days.setdefault(str(day), {'jumlah_pinjam': 0, 'jumlah_kembali': 0})['jumlah_kembali'] = count
+    rows = [dict(tanggal=date.fromisoformat(day[:10]), **counts) for day, counts in days.items()]
+    if rows:
+        db.session.execute(insert(StatHarian), rows)
+
+    for model, key, group_column, query in (
+        (StatBuku, 'book_id', loans.c.book_id, db.session.query(loans.c.book_id, func.count(), active)),
+        (StatAnggota, 'member_id', loans.c.member_id, db.session.query(loans.c.member_id, func.count(), active)),
+        (StatKategori, 'category_id', Book.category_id,
+         db.session.query(Book.category_id, func.count(), active).select_from(loans).join(Book, loans.c.book_id == Book.id)),
+    ):
+        rows = [
+            {key: key_value, 'total_pinjam': total, 'sedang_dipinjam': int(active_count or 0)}
+            for key_value, total, active_count in query.group_by(group_column)
+        ]
+        if rows:
+            db.session.execute(insert(model), rows)
+    db.session.commit()
+
+@bp.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Hitung ulang tabel statistik dari awal (mis. setelah impor data lama)."""
+    rebuild_stats()
+    print("Statistics tables rebuilt.")
+
+# --- Deteksi Keterlambatan (Overdue Sweeper) ---
+
+overdue_sweep_state = {'last_run': None, 'last_count': None, 'total_marked': 0, 'runs': 0}
+_overdue_sweeper_lock = threading.Lock()
+
+def overdue_filter(today):
+    # (status, tanggal_kembali_seharusnya) IN-range pada index komposit: O(jumlah yang terlambat)
+    return and_(
+        Borrowing.status.in_(['dipinjam', 'terlambat']),
+        Borrowing.tanggal_kembali_seharusnya < today
+    )
+
+def sweep_overdue(today=None):
+    """Tandai semua peminjaman 'dipinjam' yang lewat jatuh tempo sebagai 'terlambat' dengan satu UPDATE."""
+    today = today or datetime.utcnow().date()
+    result = db.session.execute(
+        update(Borrowing)
+        .where(Borrowing.status == 'dipinjam', Borrowing.tanggal_kembali_seharusnya < today)
+        .values(status='terlambat', version=Borrowing.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    count = result.rowcount
+    if count:
+        # Bisa ribuan baris: cukup jumlahnya, terminal memuat ulang daftar peminjamannya
+        publish_event('borrowings.overdue', {'count': count})
+    db.session.commit()
+    with _overdue_sweeper_lock:
+        overdue_sweep_state['last_run'] = datetime.utcnow().isoformat()
+        overdue_sweep_state['last_count'] = count
+        overdue_sweep_state['total_marked'] += count
+        overdue_sweep_state['runs'] += 1
+    current_app.logger.info('Overdue sweep marked %d borrowings as terlambat', count)
+    return count
+
+@bp.cli.command('sweep-overdue')
+def sweep_overdue_command():
+    """Jalankan satu kali sweep keterlambatan (mis. dari cron)."""
+    print(f"{sweep_overdue()} borrowings marked as terlambat.")
+
+# --- Arsip Riwayat Peminjaman ---
+
+archive_state = {'last_run': None, 'last_count': None, 'total_archived': 0, 'runs': 0}
+_archive_lock = threading.Lock()
+
+ARCHIVE_COLUMNS = ('id', 'book_id', 'member_id', 'tanggal_peminjaman', 'tanggal_kembali_seharusnya', 'tanggal_pengembalian_aktual')
+
+def archive_column(name):
+    # Kolom arsip untuk kolom borrowings `name`; id asli disimpan sebagai borrowing_id
+    return ArchivedBorrowing.borrowing_id if name == 'id' else getattr(ArchivedBorrowing, name)
+
+def archivable_filter():
+    # Hanya peminjaman yang benar-benar selesai; sisanya (termasuk status yang diubah manual) tetap di borrowings
+    return and_(Borrowing.status == 'dikembalikan', Borrowing.tanggal_pengembalian_aktual.isnot(None))
+
+def has_active_loans(*criteria):
+    """EXISTS peminjaman yang belum selesai (belum bisa diarsipkan), tanpa memuat barisnya."""
+    return db.session.query(
+        Borrowing.query.filter(*criteria, ~archivable_filter()).exists()
+    ).scalar()
+
+def archive_returned(*criteria):
+    """Pindahkan peminjaman selesai yang cocok dengan criteria ke borrowings_archive.
+
+    INSERT ... SELECT lalu DELETE dengan kondisi yang sama, di transaksi pemanggil (tidak commit).
+    DELETE lewat Core, jadi tidak menulis tombstone: baris ini dipindah, bukan dihapus.
+    Mengembalikan jumlah baris yang dipindah.
+    """
+    condition = and_(archivable_filter(), *criteria)
+    db.session.execute(insert(ArchivedBorrowing).from_select(
+        [*[archive_column(column).key for column in ARCHIVE_COLUMNS], 'tanggal_diarsipkan'],
+        select(*[getattr(Borrowing, column) for column in ARCHIVE_COLUMNS], literal(datetime.utcnow(), db.DateTime)).where(condition)
+    ))
+    result = db.session.execute(delete(Borrowing).where(condition).execution_options(synchronize_session=False))
+    return result.rowcount
+
+def archive_borrowings(retention_days=None, batch_size=None):
+    """Arsipkan peminjaman yang sudah kembali lebih dari retention_days hari lalu, per batch.
+
+    Setiap batch adalah transaksi sendiri (SELECT id ... FOR UPDATE, INSERT ... SELECT, DELETE),
+    jadi baris borrowings tidak terkunci lama dan pekerjaan yang terhenti cukup diulang.
+    """
+    config = current_app.config
+    retention_days = config['ARCHIVE_RETENTION_DAYS'] if retention_days is None else retention_days
+    batch_size = config['ARCHIVE_BATCH_SIZE'] if batch_size is None else batch_size
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    total = 0
+    while True:
+        ids = [row_id for (row_id,) in db.session.query(Borrowing.id).filter(
+            archivable_filter(), Borrowing.tanggal_pengembalian_aktual < cutoff
+        ).order_by(Borrowing.id).limit(batch_size).with_for_update()]
+        if not ids:
+            db.session.rollback()
+            break
+        count = archive_returned(Borrowing.id.in_(ids))
+        publish_event('borrowings.archived', {'count': count})
+        db.session.commit()
+        total += count
+        if len(ids) < batch_size:
+            break
+        time.sleep(config['ARCHIVE_BATCH_PAUSE'])
+    with _archive_lock:
+        archive_state['last_run'] = datetime.utcnow().isoformat()
+        archive_state['last_count'] = total
+        archive_state['total_archived'] += total
+        archive_state['runs'] += 1
+    current_app.logger.info('Archived %d returned borrowings older than %d days', total, retention_days)
+    return total
+
+@bp.cli.command('archive-borrowings')
+@click.option('--retention-days', type=click.IntRange(min=0), default=None, help='Default: ARCHIVE_RETENTION_DAYS.')
+@click.option('--batch-size', type=click.IntRange(min=1), default=None, help='Default: ARCHIVE_BATCH_SIZE.')
+def archive_borrowings_command(retention_days, batch_size):
+    """Pindahkan peminjaman lama yang sudah kembali ke borrowings_archive (mis. dari cron)."""
+    print(f"{archive_borrowings(retention_days, batch_size)} borrowings archived.")
+
+# --- Job Latar Belakang (sweeper & arsip) ---
+
+_background_job_pids = {} # nama job -> pid proses yang sudah menjalankannya
+_background_job_lock = threading.Lock()
+
+def _background_job_loop(app, name, job, interval):
+    while True:
+        with app.app_context():
+            try:
+                job()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Background job %s failed', name)
+        time.sleep(interval)
+
+def _ensure_background_job(name, job, enabled_key, interval_key):
+    # Thread dijalankan sekali per proses (dicek lewat pid, jadi aman untuk worker hasil fork)
+    if not current_app.config[enabled_key] or _background_job_pids.get(name) == os.getpid():
+        return
+    with _background_job_lock:
+        if _background_job_pids.get(name) == os.getpid():
+            return
+        _background_job_pids[name] = os.getpid()
+    thread = threading.Thread(
+        target=_background_job_loop,
+        args=(current_app._get_current_object(), name, job, current_app.config[interval_key]),
+        name=name,
+        daemon=True
+    )
+    thread.start()
+
+@bp.before_app_request
+def _ensure_background_jobs():
+    _ensure_background_job('overdue-sweeper', sweep_overdue, 'OVERDUE_SWEEP_ENABLED', 'OVERDUE_SWEEP_INTERVAL')
+    _ensure_background_job('borrowing-archiver', archive_borrowings, 'ARCHIVE_ENABLED', 'ARCHIVE_INTERVAL')
+
 # --- Resource API untuk setiap Model ---
 
 class AuthorList(Resource):
     def get(self):
-        authors = Author.query.all()
-        return [author.to_dict() for author in authors], 200
+        return cached_response(['authors'], lambda: list_response(Author.query, Author))
 
     def post(self):
         data = request.get_json()
@@ -166,16 +1732,17 @@ class AuthorList(Resource):
             tanggal_lahir=tanggal_lahir_obj
         )
         db.session.add(new_author)
+        cache_invalidate('authors')
         db.session.commit()
         return new_author.to_dict(), 201
 
 class AuthorResource(Resource):
     def get(self, author_id):
-        author = Author.query.get_or_404(author_id)
-        return author.to_dict(), 200
+        return cached_response([f'author:{author_id}'], lambda: entity_response(Author.query.get_or_404(author_id)))
 
     def put(self, author_id):
         author = Author.query.get_or_404(author_id)
+        check_if_match(author)
         data = request.get_json()
         if not data:
             return {'message': 'No update data provided'}, 400
@@ -191,21 +1758,23 @@ class AuthorResource(Resource):
                 except ValueError:
                     return {'message': 'Invalid date format for tanggal_lahir. Use YYYY-MM-DD.'}, 400
 
+        cache_invalidate(f'author:{author_id}', 'authors')
         db.session.commit()
-        return author.to_dict(), 200
+        return author.to_dict(), 200, validator_headers(*entity_validators(author))
 
     def delete(self, author_id):
         author = Author.query.get_or_404(author_id)
+        check_if_match(author)
         if author.books:
             return {'message': 'Cannot delete author with associated books. Delete books first.'}, 409
         db.session.delete(author)
+        cache_invalidate(f'author:{author_id}', 'authors')
         db.session.commit()
         return {'message': 'Author deleted successfully'}, 204
 
 class CategoryList(Resource):
     def get(self):
-        categories = Category.query.all()
-        return [category.to_dict() for category in categories], 200
+        return cached_response(['categories'], lambda: list_response(Category.query, Category))
 
     def post(self):
         data = request.get_json()
@@ -217,38 +1786,64 @@ class CategoryList(Resource):
 
         new_category = Category(nama=data['nama'])
         db.session.add(new_category)
+        cache_invalidate('categories')
         db.session.commit()
         return new_category.to_dict(), 201
 
 class CategoryResource(Resource):
     def get(self, category_id):
-        category = Category.query.get_or_404(category_id)
-        return category.to_dict(), 200
+        return cached_response([f'category:{category_id}'], lambda: entity_response(Category.query.get_or_404(category_id)))
 
     def put(self, category_id):
         category = Category.query.get_or_404(category_id)
+        check_if_match(category)
         data = request.get_json()
         if not data:
             return {'message': 'No update data provided'}, 400
 
         if 'nama' in data:
             category.nama = data['nama']
-        
+
+        # Tag category:<id> juga menempel pada payload buku yang meng-embed kategori ini
+        cache_invalidate(f'category:{category_id}', 'categories')
         db.session.commit()
-        return category.to_dict(), 200
+        return category.to_dict(), 200, validator_headers(*entity_validators(category))
 
     def delete(self, category_id):
         category = Category.query.get_or_404(category_id)
+        check_if_match(category)
         if category.books:
             return {'message': 'Cannot delete category with associated books. Delete books first.'}, 409
         db.session.delete(category)
+        cache_invalidate(f'category:{category_id}', 'categories')
         db.session.commit()
         return {'message': 'Category deleted successfully'}, 204
 
 class BookList(Resource):
     def get(self):
-        books = Book.query.all()
-        return [book.to_dict(include_relations=False) for book in books], 200
+        query = Book.query
+        author_id = int_arg('author_id')
+        if author_id is not None:
+            query = query.filter(Book.author_id == author_id)
+        category_id = int_arg('category_id')
+        if category_id is not None:
+            query = query.filter(Book.category_id == category_id)
+        tahun_terbit_min = int_arg('tahun_terbit_min')
+        if tahun_terbit_min is not None:
+            query = query.filter(Book.tahun_terbit >= tahun_terbit_min)
+        tahun_terbit_max = int_arg('tahun_terbit_max')
+        if tahun_terbit_max is not None:
+            query = query.filter(Book.tahun_terbit <= tahun_terbit_max)
+        tags = ['books']
+        in_stock = bool_arg('in_stock')
+        if in_stock:
+            query = query.filter(Book.stok > 0)
+        if in_stock or request.args.get('sort', '').lstrip('-') == 'stok':
+            # Isi/urutan halaman bergantung pada stok: ikut diinvalidasi setiap perubahan stok
+            tags.append('books:stok')
+
+        expand = expand_arg(Book.EXPANDABLE)
+        return cached_response(tags, lambda: list_response(query, Book, expand=expand), entity='book')
 
     def post(self):
         data = request.get_json()
@@ -277,16 +1872,26 @@ class BookList(Resource):
             category_id=data['category_id']
         )
         db.session.add(new_book)
+        db.session.flush()
+        publish_event('book.created', new_book.to_dict())
+        cache_invalidate('books')
         db.session.commit()
-        return new_book.to_dict(include_relations=True), 201
+        expand = expand_arg(Book.EXPANDABLE, default=Book.EXPANDABLE)
+        new_book = reload_with_relations(Book, new_book.id, expand)
+        return new_book.to_dict(expand), 201
 
 class BookResource(Resource):
     def get(self, book_id):
-        book = Book.query.get_or_404(book_id)
-        return book.to_dict(include_relations=True), 200
+        expand = expand_arg(Book.EXPANDABLE, default=Book.EXPANDABLE)
+        return cached_response(
+            [f'book:{book_id}'],
+            lambda: entity_response(with_relations(Book.query, Book, expand, joinedload).get_or_404(book_id), expand)
+        )
 
+    @retry_on_conflict
     def put(self, book_id):
         book = Book.query.get_or_404(book_id)
+        check_if_match(book, expand_arg(Book.EXPANDABLE, default=Book.EXPANDABLE))
         data = request.get_json()
         if not data:
             return {'message': 'No update data provided'}, 400
@@ -310,23 +1915,41 @@ class BookResource(Resource):
             category = Category.query.get(data['category_id'])
             if not category:
                 return {'message': f"Category with ID {data['category_id']} not found."}, 404
-            book.category_id = data['category_id']
+            old_category_id = book.category_id
+            book.category_id = category.id
+            db.session.flush()
+            stats_move_book_category(book.id, old_category_id, book.category_id)
 
+        if 'stok' in data:
+            db.session.flush() # version baru terisi setelah flush
+            publish_event('book.stock', {'id': book.id, 'stok': book.stok, 'version': book.version})
+        cache_invalidate(f'book:{book_id}', 'books')
         db.session.commit()
-        return book.to_dict(include_relations=True), 200
+        expand = expand_arg(Book.EXPANDABLE, default=Book.EXPANDABLE)
+        book = reload_with_relations(Book, book_id, expand)
+        return book.to_dict(expand), 200, validator_headers(*entity_validators(book, expand))
 
+    @retry_on_conflict
     def delete(self, book_id):
         book = Book.query.get_or_404(book_id)
-        if book.borrowings:
+        check_if_match(book, expand_arg(Book.EXPANDABLE, default=Book.EXPANDABLE))
+        # EXISTS pada peminjaman aktif saja, bukan memuat seluruh book.borrowings
+        if has_active_loans(Borrowing.book_id == book_id):
             return {'message': 'Cannot delete book with active borrowings. Return all borrowings first.'}, 409
+        # Peminjaman selesai masih mereferensikan buku ini (foreign key): pindahkan ke arsip lebih dulu
+        archive_returned(Borrowing.book_id == book_id)
+        category_id = book.category_id
         db.session.delete(book)
+        db.session.flush()
+        # rebuild_stats menghitung stat_kategori lewat join ke books: buku yang dihapus keluar dari kategorinya
+        stats_move_book_category(book_id, category_id, None)
+        cache_invalidate(f'book:{book_id}', 'books')
         db.session.commit()
         return {'message': 'Book deleted successfully'}, 204
 
 class MemberList(Resource):
     def get(self):
-        members = Member.query.all()
-        return [member.to_dict() for member in members], 200
+        return list_response(Member.query, Member)
 
     def post(self):
         data = request.get_json()
@@ -346,16 +1969,18 @@ class MemberList(Resource):
             email=data.get('email')
         )
         db.session.add(new_member)
+        db.session.flush()
+        publish_event('member.created', new_member.to_dict())
         db.session.commit()
         return new_member.to_dict(), 201
 
 class MemberResource(Resource):
     def get(self, member_id):
-        member = Member.query.get_or_404(member_id)
-        return member.to_dict(), 200
+        return entity_response(Member.query.get_or_404(member_id))
 
     def put(self, member_id):
         member = Member.query.get_or_404(member_id)
+        check_if_match(member)
         data = request.get_json()
         if not data:
             return {'message': 'No update data provided'}, 400
@@ -374,37 +1999,59 @@ class MemberResource(Resource):
             member.email = data['email']
 
         db.session.commit()
-        return member.to_dict(), 200
+        return member.to_dict(), 200, validator_headers(*entity_validators(member))
 
     def delete(self, member_id):
         member = Member.query.get_or_404(member_id)
-        if member.borrowings:
+        check_if_match(member)
+        if has_active_loans(Borrowing.member_id == member_id):
             return {'message': 'Cannot delete member with active borrowings. Return all borrowings first.'}, 409
+        archive_returned(Borrowing.member_id == member_id)
         db.session.delete(member)
         db.session.commit()
         return {'message': 'Member deleted successfully'}, 204
 
+def borrowing_status_arg():
+    status = request.args.get('status')
+    if status and status not in ['dipinjam', 'dikembalikan', 'terlambat']:
+        abort(400, message='Invalid status. Must be "dipinjam", "dikembalikan", or "terlambat".')
+    return status
+
+def borrowing_filters(model):
+    """Filter ?member_id, ?book_id dan rentang tanggal peminjaman; berlaku untuk Borrowing maupun ArchivedBorrowing."""
+    filters = []
+    member_id = int_arg('member_id')
+    if member_id is not None:
+        filters.append(model.member_id == member_id)
+    book_id = int_arg('book_id')
+    if book_id is not None:
+        filters.append(model.book_id == book_id)
+    # Rentang tanggal peminjaman (inklusif, format YYYY-MM-DD)
+    tanggal_dari = date_arg('tanggal_dari')
+    if tanggal_dari is not None:
+        filters.append(model.tanggal_peminjaman >= datetime.combine(tanggal_dari, datetime.min.time()))
+    tanggal_sampai = date_arg('tanggal_sampai')
+    if tanggal_sampai is not None:
+        filters.append(model.tanggal_peminjaman < datetime.combine(tanggal_sampai + timedelta(days=1), datetime.min.time()))
+    return filters
+
 class BorrowingList(Resource):
     def get(self):
-        borrowings = Borrowing.query.all()
-        # Mengembalikan dengan relasi agar lebih informatif
-        return [borrowing.to_dict(include_relations=True) for borrowing in borrowings], 200
+        query = Borrowing.query.filter(*borrowing_filters(Borrowing))
+        status = borrowing_status_arg()
+        if status:
+            query = query.filter(Borrowing.status == status)
 
+        # Relasi hanya di-embed jika diminta (?expand=book,member), dimuat dengan selectinload
+        expand = expand_arg(Borrowing.EXPANDABLE)
+        return list_response(query, Borrowing, expand=expand)
+
+    @retry_on_conflict
     def post(self):
         data = request.get_json()
         required_fields = ['book_id', 'member_id', 'durasi_peminjaman_hari'] # durasi_peminjaman_hari adalah input baru dari frontend
         if not all(field in data for field in required_fields):
             return {'message': f'Required fields are: {", ".join(required_fields)}'}, 400
-        
-        book = Book.query.get(data['book_id'])
-        if not book:
-            return {'message': f"Book with ID {data['book_id']} not found."}, 404
-        if book.stok <= 0:
-            return {'message': 'Book is out of stock.'}, 400
-        
-        member = Member.query.get(data['member_id'])
-        if not member:
-            return {'message': f"Member with ID {data['member_id']} not found."}, 404
 
         # Hitung tanggal_kembali_seharusnya
         try:
@@ -413,7 +2060,19 @@ class BorrowingList(Resource):
                 return {'message': 'Durasi peminjaman harus lebih dari 0 hari.'}, 400
         except ValueError:
             return {'message': 'Durasi peminjaman harus berupa angka.'}, 400
-        
+
+        # Kurangi stok buku secara atomik: UPDATE ... WHERE stok > 0, bukan baca-cek-tulis
+        if not adjust_stock(data['book_id'], -1):
+            db.session.rollback()
+            if db.session.get(Book, data['book_id']) is None:
+                return {'message': f"Book with ID {data['book_id']} not found."}, 404
+            return {'message': 'Book is out of stock.'}, 400
+
+        member = Member.query.get(data['member_id'])
+        if not member:
+            db.session.rollback()
+            return {'message': f"Member with ID {data['member_id']} not found."}, 404
+
         tanggal_peminjaman = datetime.utcnow()
         tanggal_kembali_seharusnya = (tanggal_peminjaman + timedelta(days=durasi_peminjaman)).date()
 
@@ -425,20 +2084,24 @@ class BorrowingList(Resource):
             status='dipinjam'
         )
         db.session.add(new_borrowing)
-        
-        # Kurangi stok buku
-        book.stok -= 1
-        
+        stats_record_loans([(data['book_id'], data['member_id'], tanggal_peminjaman)])
+        db.session.flush()
+        publish_event('borrowing.created', new_borrowing.to_dict())
         db.session.commit()
-        return new_borrowing.to_dict(include_relations=True), 201
+        expand = expand_arg(Borrowing.EXPANDABLE, default=Borrowing.EXPANDABLE)
+        new_borrowing = reload_with_relations(Borrowing, new_borrowing.id, expand)
+        return new_borrowing.to_dict(expand), 201
 
 class BorrowingResource(Resource):
     def get(self, borrowing_id):
-        borrowing = Borrowing.query.get_or_404(borrowing_id)
-        return borrowing.to_dict(include_relations=True), 200
+        expand = expand_arg(Borrowing.EXPANDABLE, default=Borrowing.EXPANDABLE)
+        borrowing = with_relations(Borrowing.query, Borrowing, expand, joinedload).get_or_404(borrowing_id)
+        return entity_response(borrowing, expand)
 
+    @retry_on_conflict
     def put(self, borrowing_id):
         borrowing = Borrowing.query.get_or_404(borrowing_id)
+        check_if_match(borrowing, expand_arg(Borrowing.EXPANDABLE, default=Borrowing.EXPANDABLE))
         data = request.get_json()
         if not data:
             return {'message': 'No update data provided'}, 400
@@ -451,8 +2114,14 @@ class BorrowingResource(Resource):
             # Jika status diubah menjadi 'dikembalikan', set tanggal_pengembalian_aktual
             if data['status'] == 'dikembalikan' and not borrowing.tanggal_pengembalian_aktual:
                 borrowing.tanggal_pengembalian_aktual = datetime.utcnow()
+                borrowing.status = data['status']
+                # Flush dengan WHERE version = ... : jika pengembalian yang sama diproses bersamaan,
+                # hanya satu yang lolos (yang lain StaleDataError -> retry), jadi stok tidak ditambah dua kali
+                db.session.flush()
                 # Tambah stok buku jika dikembalikan
-                borrowing.book.stok += 1
+                adjust_stock(borrowing.book_id, 1)
+                stats_record_return(borrowing.book_id, borrowing.member_id, borrowing.tanggal_pengembalian_aktual)
+                publish_event('borrowing.returned', borrowing.to_dict())
             elif data['status'] != 'dikembalikan' and borrowing.tanggal_pengembalian_aktual:
                 # Jika status diubah dari 'dikembalikan' ke lainnya (misal: 'dipinjam')
                 # dan ada tanggal_pengembalian_aktual, bisa jadi error logika atau perlu dikurangi stok lagi.
@@ -462,20 +2131,563 @@ class BorrowingResource(Resource):
             borrowing.status = data['status']
 
         db.session.commit()
-        return borrowing.to_dict(include_relations=True), 200
+        expand = expand_arg(Borrowing.EXPANDABLE, default=Borrowing.EXPANDABLE)
+        borrowing = reload_with_relations(Borrowing, borrowing_id, expand)
+        return borrowing.to_dict(expand), 200, validator_headers(*entity_validators(borrowing, expand))
 
+    @retry_on_conflict
     def delete(self, borrowing_id):
         borrowing = Borrowing.query.get_or_404(borrowing_id)
-        # Jika peminjaman dihapus dan statusnya masih 'dipinjam', kembalikan stok buku
-        if borrowing.status == 'dipinjam':
-            book = Book.query.get(borrowing.book_id)
-            if book:
-                book.stok += 1
-        
+        check_if_match(borrowing, expand_arg(Borrowing.EXPANDABLE, default=Borrowing.EXPANDABLE))
+        book_id = borrowing.book_id
+        # Buku belum kembali ('dipinjam' atau 'terlambat'), jadi stoknya dikembalikan saat record dihapus
+        restore_stock = borrowing.tanggal_pengembalian_aktual is None
+
+        # Hapus jejak record ini dari counter statistik agar tetap sama dengan hasil rebuild
+        stats_record_loans([(borrowing.book_id, borrowing.member_id, borrowing.tanggal_peminjaman)], sign=-1)
+        if not restore_stock:
+            stats_record_return(borrowing.book_id, borrowing.member_id, borrowing.tanggal_pengembalian_aktual, sign=-1)
+
+        # DELETE ... WHERE version = ... gagal (StaleDataError -> retry) jika peminjaman baru saja dikembalikan
         db.session.delete(borrowing)
+        db.session.flush()
+        if restore_stock:
+            adjust_stock(book_id, 1)
+        publish_event('borrowing.deleted', {'id': borrowing_id})
         db.session.commit()
         return {'message': 'Borrowing record deleted successfully'}, 204
 
+def history_dict(row, archived):
+    data = {key: value.isoformat() if isinstance(value, date) else value for key, value in row._asdict().items()}
+    data['diarsipkan'] = archived
+    return data
+
+class BorrowingHistoryList(Resource):
+    """Riwayat peminjaman lintas tabel aktif dan arsip.
+
+    Filter, ?sort= dan cursor sama dengan /borrowings. Setiap tabel di-query terpisah dengan
+    index-nya sendiri (masing-masing paling banyak limit + 1 baris), lalu digabung di Python.
+    Baris arsip ditampilkan dengan id aslinya (borrowing_id).
+    """
+
+    def get(self):
+        status = borrowing_status_arg()
+        limit = page_limit()
+        rows, sort_param = [], 'id'
+        for model, archived in ((Borrowing, False), (ArchivedBorrowing, True)):
+            if archived and status not in (None, 'dikembalikan'):
+                continue
+            columns = [archive_column(column).label(column) if archived else getattr(model, column) for column in ARCHIVE_COLUMNS]
+            query = db.session.query(*columns, Borrowing.status if not archived else literal('dikembalikan').label('status'))
+            query = query.filter(*borrowing_filters(model))
+            if status and not archived:
+                query = query.filter(Borrowing.status == status)
+            query, sort_param = keyset_query(query, model, ArchivedBorrowing.borrowing_id if archived else None)
+            rows += [(row, archived) for row in query.limit(limit + 1)]
+
+        sort_key = sort_param.lstrip('-')
+        rows.sort(key=lambda item: (getattr(item[0], sort_key), item[0].id), reverse=sort_param.startswith('-'))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1][0]
+            next_cursor = encode_cursor([sort_param, _cursor_dump(getattr(last, sort_key)), last.id])
+        return [history_dict(row, archived) for row, archived in rows], 200, page_headers(next_cursor)
+
+class OverdueBorrowingList(Resource):
+    def get(self):
+        # Termasuk yang sudah lewat jatuh tempo tetapi belum tersapu sweeper
+        query = Borrowing.query.filter(overdue_filter(datetime.utcnow().date()))
+        expand = expand_arg(Borrowing.EXPANDABLE)
+        return list_response(query, Borrowing, expand=expand)
+
+class OverdueSweepResource(Resource):
+    def get(self):
+        with _overdue_sweeper_lock:
+            return dict(overdue_sweep_state), 200
+
+    def post(self):
+        count = sweep_overdue()
+        return {'marked': count, 'state': dict(overdue_sweep_state)}, 200
+
+# --- Resource Statistik Dashboard ---
+
+STATS_DEFAULT_LIMIT = 10
+STATS_MAX_DAYS = 366
+
+class StatsResource(Resource):
+    """Laporan dashboard yang dibaca dari tabel ringkasan, bukan GROUP BY atas borrowings."""
+
+    def get(self, report):
+        handler = getattr(self, 'report_' + report.replace('-', '_'), None)
+        if handler is None:
+            return {'message': 'Unknown report. Must be one of: loans-per-day, top-books, active-loans, stock-out, categories.'}, 404
+        return handler()
+
+    def _limit(self):
+        limit = int_arg('limit') or STATS_DEFAULT_LIMIT
+        if limit <= 0 or limit > MAX_PAGE_SIZE:
+            abort(400, message=f'limit must be between 1 and {MAX_PAGE_SIZE}.')
+        return limit
+
+    def report_loans_per_day(self):
+        sampai = date_arg('sampai') or datetime.utcnow().date()
+        dari = date_arg('dari') or sampai - timedelta(days=29)
+        if dari > sampai or (sampai - dari).days >= STATS_MAX_DAYS:
+            return {'message': f'Invalid range. dari must be before sampai and span at most {STATS_MAX_DAYS} days.'}, 400
+        rows = {row.tanggal: row for row in StatHarian.query.filter(StatHarian.tanggal.between(dari, sampai))}
+        result = []
+        day = dari
+        while day <= sampai:
+            row = rows.get(day)
+            result.append(row.to_dict() if row else {'tanggal': day.isoformat(), 'jumlah_pinjam': 0, 'jumlah_kembali': 0})
+            day += timedelta(days=1)
+        return result, 200
+
+    def report_top_books(self):
+        rows = db.session.query(StatBuku, Book).join(Book, Book.id == StatBuku.book_id) \
+            .filter(StatBuku.total_pinjam > 0) \
+            .order_by(StatBuku.total_pinjam.desc(), StatBuku.book_id).limit(self._limit())
+        return [
+            dict(book.to_dict(), total_pinjam=stat.total_pinjam, sedang_dipinjam=stat.sedang_dipinjam)
+            for stat, book in rows
+        ], 200
+
+    def report_active_loans(self):
+        member_id = int_arg('member_id')
+        if member_id is not None:
+            stat = db.session.get(StatAnggota, member_id)
+            return {
+                'member_id': member_id,
+                'total_pinjam': stat.total_pinjam if stat else 0,
+                'sedang_dipinjam': stat.sedang_dipinjam if stat else 0
+            }, 200
+        rows = db.session.query(StatAnggota, Member).join(Member, Member.id == StatAnggota.member_id) \
+            .filter(StatAnggota.sedang_dipinjam > 0) \
+            .order_by(StatAnggota.sedang_dipinjam.desc(), StatAnggota.member_id).limit(self._limit())
+        return [
+            dict(member.to_dict(), total_pinjam=stat.total_pinjam, sedang_dipinjam=stat.sedang_dipinjam)
+            for stat, member in rows
+        ], 200
+
+    def report_stock_out(self):
+        # Range scan pada index (stok, id): hanya membaca judul yang stoknya habis
+        books = Book.query.filter(Book.stok <= 0).order_by(Book.stok, Book.id).limit(self._limit())
+        return [book.to_dict() for book in books], 200
+
+    def report_categories(self):
+        rows = db.session.query(StatKategori, Category).join(Category, Category.id == StatKategori.category_id) \
+            .order_by(StatKategori.total_pinjam.desc(), StatKategori.category_id)
+        return [
+            dict(category.to_dict(), total_pinjam=stat.total_pinjam, sedang_dipinjam=stat.sedang_dipinjam)
+            for stat, category in rows
+        ], 200
+
+# --- Resource Bulk Import ---
+
+class BookBulk(Resource):
+    FIELDS = {'judul': str, 'tahun_terbit': int, 'isbn': str, 'stok': int, 'author_id': int, 'category_id': int}
+    REQUIRED = ('judul', 'author_id', 'category_id')
+
+    @retry_on_conflict
+    def post(self):
+        mode, chunk_size = bulk_options()
+        rows = parse_bulk_payload()
+        errors, cleaned = {}, []
+        for index, row in enumerate(rows):
+            try:
+                cleaned.append((index, clean_bulk_row(row, self.FIELDS, self.REQUIRED)))
+            except ValueError as e:
+                errors[index] = str(e)
+
+        # Validasi berbasis himpunan: satu lookup IN (...) per kolom unik dan per foreign key
+        author_ids = existing_values(Author.id, [row['author_id'] for _, row in cleaned])
+        category_ids = existing_values(Category.id, [row['category_id'] for _, row in cleaned])
+        taken_isbn = existing_values(Book.isbn, [row['isbn'] for _, row in cleaned])
+        taken_judul = existing_values(Book.judul, [row['judul'] for _, row in cleaned])
+
+        valid = []
+        for index, row in cleaned:
+            if row['author_id'] not in author_ids:
+                errors[index] = f"Author with ID {row['author_id']} not found."
+            elif row['category_id'] not in category_ids:
+                errors[index] = f"Category with ID {row['category_id']} not found."
+            elif row['isbn'] and row['isbn'] in taken_isbn:
+                errors[index] = 'Book with this ISBN already exists.'
+            elif row['judul'] in taken_judul:
+                errors[index] = 'Book with this title already exists.'
+            else:
+                # Duplikat di dalam batch yang sama juga ditolak
+                if row['isbn']:
+                    taken_isbn.add(row['isbn'])
+                taken_judul.add(row['judul'])
+                if row['stok'] is None:
+                    row['stok'] = 0
+                valid.append((index, row))
+
+        return bulk_write(Book, valid, errors, len(rows), mode, chunk_size, natural_key='judul')
+
+class MemberBulk(Resource):
+    FIELDS = {'nama': str, 'alamat': str, 'telepon': str, 'email': str}
+    REQUIRED = ('nama', 'telepon')
+
+    @retry_on_conflict
+    def post(self):
+        mode, chunk_size = bulk_options()
+        rows = parse_bulk_payload()
+        errors, cleaned = {}, []
+        for index, row in enumerate(rows):
+            try:
+                cleaned.append((index, clean_bulk_row(row, self.FIELDS, self.REQUIRED)))
+            except ValueError as e:
+                errors[index] = str(e)
+
+        taken_telepon = existing_values(Member.telepon, [row['telepon'] for _, row in cleaned])
+        taken_email = existing_values(Member.email, [row['email'] for _, row in cleaned])
+
+        valid = []
+        for index, row in cleaned:
+            if row['telepon'] in taken_telepon:
+                errors[index] = 'Member with this phone number already exists.'
+            elif row['email'] and row['email'] in taken_email:
+                errors[index] = 'Member with this email already exists.'
+            else:
+                taken_telepon.add(row['telepon'])
+                if row['email']:
+                    taken_email.add(row['email'])
+                valid.append((index, row))
+
+        return bulk_write(Member, valid, errors, len(rows), mode, chunk_size, natural_key='telepon')
+
+class BorrowingBulk(Resource):
+    FIELDS = {'book_id': int, 'member_id': int, 'durasi_peminjaman_hari': int}
+    REQUIRED = ('book_id', 'member_id', 'durasi_peminjaman_hari')
+
+    @retry_on_conflict
+    def post(self):
+        mode, chunk_size = bulk_options()
+        rows = parse_bulk_payload()
+        errors, cleaned = {}, []
+        for index, row in enumerate(rows):
+            try:
+                cleaned.append((index, clean_bulk_row(row, self.FIELDS, self.REQUIRED)))
+            except ValueError as e:
+                errors[index] = str(e)
+
+        book_ids = list({row['book_id'] for _, row in cleaned})
+        stok = {}
+        for start in range(0, len(book_ids), IN_CLAUSE_CHUNK):
+            batch = book_ids[start:start + IN_CLAUSE_CHUNK]
+            stok.update(db.session.query(Book.id, Book.stok).filter(Book.id.in_(batch)))
+        member_ids = existing_values(Member.id, [row['member_id'] for _, row in cleaned])
+
+        tanggal_peminjaman = datetime.utcnow()
+        valid = []
+        for index, row in cleaned:
+            if row['book_id'] not in stok:
+                errors[index] = f"Book with ID {row['book_id']} not found."
+            elif stok[row['book_id']] <= 0:
+                errors[index] = 'Book is out of stock.'
+            elif row['member_id'] not in member_ids:
+                errors[index] = f"Member with ID {row['member_id']} not found."
+            elif row['durasi_peminjaman_hari'] <= 0:
+                errors[index] = 'Durasi peminjaman harus lebih dari 0 hari.'
+            else:
+                # Stok dialokasikan berurutan sesuai urutan baris
+                stok[row['book_id']] -= 1
+                valid.append((index, {
+                    'book_id': row['book_id'],
+                    'member_id': row['member_id'],
+                    'tanggal_peminjaman': tanggal_peminjaman,
+                    'tanggal_kembali_seharusnya': (tanggal_peminjaman + timedelta(days=row['durasi_peminjaman_hari'])).date(),
+                    'status': 'dipinjam'
+                }))
+
+        def apply_circulation(chunk):
+            # Satu UPDATE bersyarat per buku di chunk; gagal jika stok berubah sejak validasi
+            per_book = Counter(row['book_id'] for _, row in chunk)
+            for book_id, count in per_book.items():
+                if not adjust_stock(book_id, -count):
+                    raise ValueError(f'Book with ID {book_id} is out of stock.')
+            stats_record_loans([(row['book_id'], row['member_id'], row['tanggal_peminjaman']) for _, row in chunk])
+
+        return bulk_write(Borrowing, valid, errors, len(rows), mode, chunk_size, before_chunk=apply_circulation)
+
+class BorrowingArchiveResource(Resource):
+    def get(self):
+        with _archive_lock:
+            return dict(archive_state), 200
+
+    def post(self):
+        retention_days, batch_size = int_arg('retention_days'), int_arg('batch_size')
+        if retention_days is not None and retention_days < 0:
+            return {'message': 'retention_days must be 0 or greater.'}, 400
+        if batch_size is not None and batch_size <= 0:
+            return {'message': 'batch_size must be greater than 0.'}, 400
+        count = archive_borrowings(retention_days, batch_size)
+        return {'archived': count, 'state': dict(archive_state)}, 200
+
+# --- Resource Sirkulasi Batch (Meja Peminjaman) ---
+
+CIRCULATION_MAX_ITEMS = 100
+
+def circulation_ids(data, field):
+    ids = data.get(field)
+    if not isinstance(ids, list) or not ids:
+        abort(400, message=f'{field} must be a non-empty list of IDs.')
+    if len(ids) > CIRCULATION_MAX_ITEMS:
+        abort(400, message=f'Too many items. Maximum is {CIRCULATION_MAX_ITEMS} per request.')
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in ids):
+        abort(400, message=f'{field} must contain integer IDs only.')
+    return ids
+
+def circulation_member_id(data, required=True):
+    member_id = data.get('member_id')
+    if member_id is None and not required:
+        return None
+    if not isinstance(member_id, int) or isinstance(member_id, bool):
+        abort(400, message='member_id must be an integer ID.')
+    return member_id
+
+def circulation_report(mode, member_id, results, borrowings):
+    """Laporan per item bergaya bulk: 201 semua berhasil, 207 sebagian, 400 tidak ada yang ditulis."""
+    failed = sum(1 for result in results if result['status'] == 'error')
+    if mode == 'atomic' and failed:
+        for result in results:
+            if result['status'] != 'error':
+                result['status'] = 'skipped'
+    by_id = {borrowing.id: borrowing.to_dict() for borrowing in borrowings}
+    for result in results:
+        if result['status'] not in ('error', 'skipped'):
+            result['borrowing'] = by_id[result.pop('borrowing_id')]
+    succeeded = len(results) - failed if not (mode == 'atomic' and failed) else 0
+    report = {'mode': mode, 'member_id': member_id, 'total': len(results), 'succeeded': succeeded, 'failed': failed, 'results': results}
+    if not failed:
+        return report, 201
+    return report, 207 if succeeded else 400
+
+def reload_borrowings(ids):
+    # Baris hasil UPDATE/INSERT Core dimuat dengan satu SELECT, bukan refresh per objek
+    return Borrowing.query.filter(Borrowing.id.in_(ids)).populate_existing().all() if ids else []
+
+class CheckoutResource(Resource):
+    """Satu anggota meminjam beberapa buku: validasi set-based, satu UPDATE stok, satu commit."""
+
+    @retry_on_conflict
+    def post(self):
+        mode = batch_mode()
+        data = request.get_json(silent=True) or {}
+        book_ids = circulation_ids(data, 'book_ids')
+        try:
+            durasi_peminjaman = int(data.get('durasi_peminjaman_hari', 0))
+        except (TypeError, ValueError):
+            return {'message': 'Durasi peminjaman harus berupa angka.'}, 400
+        if durasi_peminjaman <= 0:
+            return {'message': 'Durasi peminjaman harus lebih dari 0 hari.'}, 400
+        member_id = circulation_member_id(data)
+        if db.session.get(Member, member_id) is None:
+            return {'message': f'Member with ID {member_id} not found.'}, 404
+
+        # Baris buku dikunci (FOR UPDATE, urut id agar tidak deadlock) sampai commit
+        stok = dict(
+            db.session.query(Book.id, Book.stok)
+            .filter(Book.id.in_(set(book_ids)))
+            .order_by(Book.id)
+            .with_for_update()
+        )
+        results, allocated = [], Counter()
+        for index, book_id in enumerate(book_ids):
+            if book_id not in stok:
+                results.append({'index': index, 'book_id': book_id, 'status': 'error', 'message': f'Book with ID {book_id} not found.'})
+            elif stok[book_id] - allocated[book_id] <= 0:
+                results.append({'index': index, 'book_id': book_id, 'status': 'error', 'message': 'Book is out of stock.'})
+            else:
+                allocated[book_id] += 1
+                results.append({'index': index, 'book_id': book_id, 'status': 'borrowed'})
+
+        borrowings = []
+        failed = any(result['status'] == 'error' for result in results)
+        if allocated and not (mode == 'atomic' and failed):
+            # Stok berubah sejak dibaca (mis. dialek tanpa FOR UPDATE): ulangi seluruh handler lewat retry_on_conflict
+            if not adjust_stock_many({book_id: -count for book_id, count in allocated.items()}):
+                raise StaleDataError('Book stock changed during checkout.')
+            tanggal_peminjaman = datetime.utcnow()
+            tanggal_kembali_seharusnya = (tanggal_peminjaman + timedelta(days=durasi_peminjaman)).date()
+            borrowed = [result for result in results if result['status'] == 'borrowed']
+            rows = [
+                {
+                    'book_id': result['book_id'],
+                    'member_id': member_id,
+                    'tanggal_peminjaman': tanggal_peminjaman,
+                    'tanggal_kembali_seharusnya': tanggal_kembali_seharusnya,
+                    'status': 'dipinjam'
+                }
+                for result in borrowed
+            ]
+            # Paling banyak CIRCULATION_MAX_ITEMS baris, jadi INSERT per baris di MySQL masih murah
+            ids = _insert_chunk(Borrowing, rows, need_ids=True)
+            if len(ids) != len(borrowed):
+                raise RuntimeError(f'Expected {len(borrowed)} borrowing IDs from INSERT, got {len(ids)}.')
+            for result, row_id in zip(borrowed, ids):
+                result['borrowing_id'] = row_id
+            stats_record_loans([(row['book_id'], member_id, tanggal_peminjaman) for row in rows])
+            cache_invalidate('borrowings')
+            borrowings = reload_borrowings(ids)
+        # Laporan disusun sebelum commit agar event dan respons memakai dict yang sama
+        report = circulation_report(mode, member_id, results, borrowings)
+        if borrowings:
+            for result in report[0]['results']:
+                if result['status'] == 'borrowed':
+                    publish_event('borrowing.created', result['borrowing'])
+            db.session.commit()
+        return report
+
+class CheckinResource(Resource):
+    """Pengembalian beberapa peminjaman sekaligus: satu UPDATE status, satu UPDATE stok, satu commit."""
+
+    @retry_on_conflict
+    def post(self):
+        mode = batch_mode()
+        data = request.get_json(silent=True) or {}
+        borrowing_ids = circulation_ids(data, 'borrowing_ids')
+        member_id = circulation_member_id(data, required=False) # opsional: pastikan semua milik anggota ini
+
+        # Hanya kolom yang dibutuhkan, dikunci sampai commit; tidak ada lazy load borrowing.book
+        found = {
+            row.id: row for row in db.session.query(Borrowing.id, Borrowing.book_id, Borrowing.member_id, Borrowing.tanggal_pengembalian_aktual)
+            .filter(Borrowing.id.in_(set(borrowing_ids)))
+            .order_by(Borrowing.id)
+            .with_for_update()
+        }
+        results, seen, returning = [], set(), []
+        for index, borrowing_id in enumerate(borrowing_ids):
+            row = found.get(borrowing_id)
+            if row is None:
+                message = f'Borrowing with ID {borrowing_id} not found.'
+            elif borrowing_id in seen:
+                message = 'Duplicate borrowing ID in this request.'
+            elif member_id is not None and row.member_id != member_id:
+                message = f'Borrowing does not belong to member {member_id}.'
+            elif row.tanggal_pengembalian_aktual is not None:
+                message = 'Borrowing has already been returned.'
+            else:
+                seen.add(borrowing_id)
+                returning.append(row)
+                results.append({'index': index, 'borrowing_id': borrowing_id, 'status': 'returned'})
+                continue
+            results.append({'index': index, 'borrowing_id': borrowing_id, 'status': 'error', 'message': message})
+
+        failed = any(result['status'] == 'error' for result in results)
+        if returning and not (mode == 'atomic' and failed):
+            tanggal_pengembalian = datetime.utcnow()
+            # WHERE tanggal_pengembalian_aktual IS NULL: pengembalian ganda yang bersamaan hanya lolos sekali
+            result = db.session.execute(
+                update(Borrowing)
+                .where(Borrowing.id.in_([row.id for row in returning]), Borrowing.tanggal_pengembalian_aktual.is_(None))
+                .values(status='dikembalikan', tanggal_pengembalian_aktual=tanggal_pengembalian, version=Borrowing.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != len(returning):
+                raise StaleDataError('Borrowing returned concurrently during checkin.')
+            adjust_stock_many(Counter(row.book_id for row in returning))
+            stats_record_returns([(row.book_id, row.member_id, tanggal_pengembalian) for row in returning])
+        else:
+            returning = []
+        borrowings = reload_borrowings([row.id for row in returning])
+        report = circulation_report(mode, member_id, results, borrowings)
+        if borrowings:
+            for result in report[0]['results']:
+                if result['status'] == 'returned':
+                    publish_event('borrowing.returned', result['borrowing'])
+            db.session.commit()
+        return report
+
+# --- Resource Statistik Cache ---
+
+class CacheStatsResource(Resource):
+    def get(self):
+        stats = cache.stats.to_dict()
+        stats['backend'] = cache.backend
+        return stats, 200
+
+# --- Resource Pencarian ---
+
+class SearchResource(Resource):
+    def get(self):
+        q = (request.args.get('q') or '').strip()
+        if not q:
+            return {'message': 'Query parameter q is required.'}, 400
+        search_type = request.args.get('type', 'all')
+        if search_type not in ('all', 'books', 'members'):
+            return {'message': 'Invalid type. Must be "all", "books", or "members".'}, 400
+        limit = int_arg('limit') or SEARCH_DEFAULT_LIMIT
+        if limit <= 0 or limit > SEARCH_MAX_LIMIT:
+            return {'message': f'limit must be between 1 and {SEARCH_MAX_LIMIT}.'}, 400
+
+        result = {'query': q}
+        if search_type in ('all', 'books'):
+            result['books'] = search_books(q, limit)
+        if search_type in ('all', 'members'):
+            result['members'] = search_members(q, limit)
+        return result, 200
+
+# --- Resource Feed Perubahan (Sinkronisasi Inkremental) ---
+
+# Baris yang diubah dalam jendela ini belum dikirim: transaksi yang commit belakangan
+# dengan tanggal_diupdate lebih lama (atau detik yang sama) tidak akan terlewat oleh cursor
+CHANGES_SAFETY_LAG = timedelta(seconds=2)
+SYNCABLE_MODELS = {
+    'authors': Author,
+    'categories': Category,
+    'books': Book,
+    'members': Member,
+    'borrowings': Borrowing,
+}
+
+class ChangesResource(Resource):
+    def get(self, entity):
+        model = SYNCABLE_MODELS.get(entity)
+        if model is None:
+            return {'message': f'Unknown entity. Must be one of: {", ".join(SYNCABLE_MODELS)}.'}, 404
+        limit = page_limit()
+
+        # Cursor: posisi (tanggal_diupdate, id) di tabel entitas + id tombstone terakhir
+        last_updated, last_id, last_tombstone_id = None, 0, 0
+        since = request.args.get('since')
+        if since:
+            last_updated, last_id, last_tombstone_id = decode_cursor(since, id_positions=(1, 2))
+            last_updated = _cursor_load(model.tanggal_diupdate, last_updated)
+
+        watermark = datetime.utcnow() - CHANGES_SAFETY_LAG
+        query = model.query.filter(model.tanggal_diupdate < watermark)
+        if last_updated is not None:
+            query = query.filter(or_(
+                model.tanggal_diupdate > last_updated,
+                and_(model.tanggal_diupdate == last_updated, model.id > last_id)
+            ))
+        rows = query.order_by(model.tanggal_diupdate, model.id).limit(limit + 1).all()
+
+        tombstones = Tombstone.query.filter(
+            Tombstone.entitas == entity,
+            Tombstone.id > last_tombstone_id,
+            Tombstone.tanggal_dihapus < watermark
+        ).order_by(Tombstone.id).limit(limit + 1).all()
+
+        has_more = len(rows) > limit or len(tombstones) > limit
+        rows, tombstones = rows[:limit], tombstones[:limit]
+        if rows:
+            last_updated, last_id = rows[-1].tanggal_diupdate, rows[-1].id
+        if tombstones:
+            last_tombstone_id = tombstones[-1].id
+
+        return {
+            'entity': entity,
+            'changes': [row.to_dict() for row in rows],
+            'deleted': [tombstone.to_dict() for tombstone in tombstones],
+            'next_cursor': encode_cursor([_cursor_dump(last_updated), last_id, last_tombstone_id]),
+            'has_more': has_more
+        }, 200
+
 # --- Endpoint API untuk setiap Resource ---
 api.add_resource(AuthorList, '/authors')
 api.add_resource(AuthorResource, '/authors/<int:author_id>')
@@ -485,25 +2697,89 @@ api.add_resource(CategoryResource, '/categories/<int:category_id>')
 
 api.add_resource(BookList, '/books')
 api.add_resource(BookResource, '/books/<int:book_id>')
+api.add_resource(BookBulk, '/books/bulk')
 
 api.add_resource(MemberList, '/members') # Endpoint baru
 api.add_resource(MemberResource, '/members/<int:member_id>') # Endpoint baru
+api.add_resource(MemberBulk, '/members/bulk')
 
 api.add_resource(BorrowingList, '/borrowings') # Endpoint baru
 api.add_resource(BorrowingResource, '/borrowings/<int:borrowing_id>') # Endpoint baru
+api.add_resource(BorrowingBulk, '/borrowings/bulk')
+api.add_resource(CheckoutResource, '/borrowings/checkout')
+api.add_resource(CheckinResource, '/borrowings/checkin')
+api.add_resource(OverdueBorrowingList, '/borrowings/overdue')
+api.add_resource(OverdueSweepResource, '/borrowings/overdue/sweep')
+api.add_resource(BorrowingHistoryList, '/borrowings/history')
+api.add_resource(BorrowingArchiveResource, '/borrowings/archive')
+
+api.add_resource(CacheStatsResource, '/cache/stats')
+api.add_resource(ChangesResource, '/changes/<string:entity>')
+api.add_resource(SearchResource, '/search')
+api.add_resource(StatsResource, '/stats/<string:report>')
+
+# --- Route untuk metrik Prometheus ---
+@bp.route('/metrics')
+def serve_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # --- Route untuk menyajikan halaman utama (frontend) ---
-@app.route('/')
+@bp.route('/')
 def serve_index():
     return render_template('index.html')
 
-
-# --- Inisialisasi Database (Hanya untuk Development/Testing Awal) ---
-with app.app_context():
+# --- Skema Database (DDL) ---
+@bp.cli.command('init-db')
+@click.option('--sql', 'print_sql', is_flag=True, help='Cetak DDL CREATE TABLE/INDEX tanpa menjalankannya.')
+def init_db_command(print_sql):
+    """Buat tabel & index yang belum ada. Dijalankan sekali saat deploy, bukan saat import/boot worker."""
+    if print_sql:
+        # Mock engine: DDL dikompilasi untuk dialek database target (termasuk ddl_if) tanpa tersambung
+        def emit(statement, *args, **kwargs):
+            print(f"{str(statement.compile(dialect=mock.dialect)).strip()};")
+        mock = create_mock_engine(db.engine.url, emit)
+        db.metadata.create_all(mock, checkfirst=False)
+        return
     db.create_all()
     print("Database tables created/checked.")
 
+# --- Application Factory ---
+
+def _dispose_engines_after_fork(app):
+    # gunicorn --preload: master mengimpor kode lalu fork worker. Pool hasil fork tidak boleh
+    # memakai socket milik master; close=False agar koneksi master tidak ikut ditutup.
+    def after_in_child():
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+    os.register_at_fork(after_in_child=after_in_child)
+
+def create_app(config=None):
+    """Buat app Flask baru. Tidak ada koneksi database yang dibuka di sini: engine baru
+    tersambung saat query pertama, dan skema dibuat terpisah lewat `flask init-db`."""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(config or {})
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config, app.config['SQLALCHEMY_DATABASE_URI']))
+    app.config.setdefault('SQLALCHEMY_BINDS', replica_binds(app.config))
+
+    db.init_app(app)
+    app.extensions['perpustakaan_cache'] = create_cache(app.config)
+    app.extensions['perpustakaan_json'] = create_json_backend(app.config['JSON_BACKEND'])
+    app.extensions['perpustakaan_events'] = create_broker(app.config)
+    api.init_app(app)
+    cors.init_app(app)
+    app.register_blueprint(bp)
+    _dispose_engines_after_fork(app)
+    return app
+
+# Untuk `gunicorn app:app`, async_server.py dan `flask --app app ...`
+app = create_app()
+
 if __name__ == '__main__':
+    # Development: buat tabel yang belum ada lalu jalankan server
+    with app.app_context():
+        db.create_all()
     # Anda bisa mengubah port di sini jika ingin
     app.run(debug=True, port=5000) # Defaultnya 5000, Anda bisa ubah ke 5501 jika mau
     print("Flask app is running...")
\ No newline at end of file
@@ -0,0 +1,46 @@
+# async_server.py
+
+"""Mode serving kooperatif (gevent) untuk lonjakan trafik meja peminjaman.
+
+PyMySQL adalah driver pure-Python, jadi setelah monkey-patch socket-nya ikut
+kooperatif: request yang sedang menunggu MySQL hanya memarkir greenlet, bukan
+memegang thread OS. Handler, URL dan kontrak JSON sama persis dengan mode WSGI
+biasa (`python app.py`), yang tetap bisa dipakai untuk deployment lama.
+
+    python async_server.py --port 5000 --max-connections 2000
+
+Setara dengan gunicorn: gunicorn -k gevent --worker-connections 1000 app:app
+"""
+
+from gevent import monkey
+monkey.patch_all() # Harus sebelum import app/SQLAlchemy/PyMySQL agar socket & threading ikut di-patch
+
+import argparse
+
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+
+from app import app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Jalankan API perpustakaan dalam mode gevent.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--max-connections', type=int, default=1000,
+                        help='Jumlah maksimum koneksi (greenlet) yang dilayani bersamaan.')
+    parser.add_argument('--access-log', action='store_true', help='Tampilkan access log per request.')
+    args = parser.parse_args(argv)
+
+    server = WSGIServer(
+        (args.host, args.port),
+        app,
+        spawn=Pool(args.max_connections),
+        log='default' if args.access_log else None
+    )
+    print(f"Flask app is running (gevent) on http://{args.host}:{args.port} ...")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
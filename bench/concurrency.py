@@ -0,0 +1,96 @@
+# bench/concurrency.py
+
+"""Benchmark konkurensi: banyak koneksi bersamaan ke server API yang sedang berjalan.
+
+Dipakai untuk membandingkan mode WSGI threaded (`python app.py`) dengan mode gevent
+(`python async_server.py`) pada endpoint yang sama, tanpa dependensi tambahan:
+
+    python bench/concurrency.py --url http://127.0.0.1:5000 --concurrency 1000 --duration 30 /books /borrowings
+
+Hasil dicetak sebagai JSON (throughput, persentil latensi, jumlah error).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def fetch(host, port, path):
+    """Satu request GET HTTP/1.1 dengan Connection: close; mengembalikan status code."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n'.encode('ascii'))
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read() # habiskan body sampai server menutup koneksi
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def worker(host, port, paths, deadline, latencies, errors, offset):
+    index = offset
+    while time.monotonic() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            status = await fetch(host, port, path)
+        except (OSError, asyncio.IncompleteReadError, IndexError, ValueError):
+            errors['connection'] = errors.get('connection', 0) + 1
+            continue
+        latencies.append(time.perf_counter() - started)
+        if status >= 400:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+
+
+async def run(url, paths, concurrency, duration):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    latencies, errors = [], {}
+    started = time.monotonic()
+    deadline = started + duration
+    await asyncio.gather(*[
+        worker(host, port, paths, deadline, latencies, errors, offset)
+        for offset in range(concurrency)
+    ])
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        'url': url,
+        'paths': paths,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+            'p95': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+            'p99': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        },
+        'errors': errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark konkurensi API perpustakaan.')
+    parser.add_argument('paths', nargs='*', default=['/books'])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concurrency', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=30.0, help='Lama benchmark dalam detik.')
+    args = parser.parse_args(argv)
+    result = asyncio.run(run(args.url, args.paths, args.concurrency, args.duration))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
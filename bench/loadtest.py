@@ -0,0 +1,580 @@
+# bench/loadtest.py
+
+"""Load test API perpustakaan: seed katalog sintetis, jalankan mix trafik, bandingkan dengan baseline.
+
+Database diambil dari konfigurasi app (DATABASE_URL / DB_*), jadi bisa SQLite atau MySQL lokal.
+Tanpa --url, request dijalankan in-process lewat Flask test client (tanpa jaringan, cocok
+untuk CI); dengan --url, request dikirim ke server yang sedang berjalan.
+
+    DATABASE_URL=sqlite:////tmp/bench.db python bench/loadtest.py seed --reset --books 10000 --members 2000 --borrowings 20000
+    python bench/loadtest.py run --mix browse --concurrency 8 --duration 30 --save-baseline bench/baseline-browse.json
+    python bench/loadtest.py run --mix browse --concurrency 8 --duration 30 --baseline bench/baseline-browse.json
+
+Mix: browse (katalog), circulation (pinjam/kembali beruntun pada judul populer),
+registration (pendaftaran anggota), full (setiap endpoint; endpoint yang tidak tersentuh dilaporkan).
+Perbandingan baseline keluar dengan status 1 jika throughput turun, p95 naik, atau error rate
+naik melebihi toleransi.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrency import percentile # noqa: E402
+from sqlalchemy import insert # noqa: E402
+
+from app import Author, Book, Borrowing, Category, Member, create_app, db, rebuild_stats # noqa: E402
+
+SEED_CHUNK_SIZE = 1000
+MIN_SAMPLES_FOR_COMPARISON = 20
+
+
+# --- Seed Data Sintetis ---
+
+def _insert_chunks(model, rows):
+    for start in range(0, len(rows), SEED_CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start:start + SEED_CHUNK_SIZE])
+
+def seed(args):
+    """Isi database dengan katalog deterministik (sama untuk --seed yang sama)."""
+    rng = random.Random(args.seed)
+    app = create_app({'OVERDUE_SWEEP_ENABLED': False, 'ARCHIVE_ENABLED': False})
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        if db.session.query(Book.id).first() is not None:
+            raise SystemExit('Database already contains books; use --reset to start from an empty catalog.')
+
+        now = datetime.utcnow()
+        _insert_chunks(Author, [
+            {'id': i, 'nama': f'Penulis {i}', 'tanggal_lahir': (now - timedelta(days=rng.randint(20, 80) * 365)).date()}
+            for i in range(1, args.authors + 1)
+        ])
+        _insert_chunks(Category, [{'id': i, 'nama': f'Kategori {i}'} for i in range(1, args.categories + 1)])
+        _insert_chunks(Member, [
+            {'id': i, 'nama': f'Anggota {i}', 'telepon': f'08{i:010d}', 'email': f'anggota{i}@example.com'}
+            for i in range(1, args.members + 1)
+        ])
+
+        # stok = eksemplar yang masih ada di rak; eksemplar yang sedang dipinjam tidak ikut dihitung
+        active_per_book = {}
+        borrowings = []
+        for i in range(1, args.borrowings + 1):
+            book_id = rng.randint(1, args.books)
+            borrowed = now - timedelta(days=rng.randint(0, 90), seconds=rng.randint(0, 86400))
+            due = (borrowed + timedelta(days=14)).date()
+            returned = rng.random() < args.returned_ratio
+            if not returned:
+                active_per_book[book_id] = active_per_book.get(book_id, 0) + 1
+            borrowings.append({
+                'id': i,
+                'book_id': book_id,
+                'member_id': rng.randint(1, args.members),
+                'tanggal_peminjaman': borrowed,
+                'tanggal_kembali_seharusnya': due,
+                'tanggal_pengembalian_aktual': borrowed + timedelta(days=rng.randint(1, 20)) if returned else None,
+                'status': 'dikembalikan' if returned else ('terlambat' if due < now.date() else 'dipinjam')
+            })
+        _insert_chunks(Book, [
+            {
+                'id': i,
+                'judul': f'Buku {i}',
+                'tahun_terbit': rng.randint(1950, now.year),
+                'isbn': f'978{i:010d}',
+                'stok': rng.randint(0, 10),
+                'author_id': rng.randint(1, args.authors),
+                'category_id': rng.randint(1, args.categories)
+            }
+            for i in range(1, args.books + 1)
+        ])
+        _insert_chunks(Borrowing, borrowings)
+        db.session.commit()
+        rebuild_stats()
+
+        summary = {
+            'dialect': db.engine.dialect.name,
+            'seed': args.seed,
+            'authors': args.authors,
+            'categories': args.categories,
+            'books': args.books,
+            'members': args.members,
+            'borrowings': args.borrowings,
+            'active_borrowings': sum(active_per_book.values())
+        }
+    print(json.dumps(summary, indent=2))
+
+
+# --- Target Request ---
+
+class InProcessTarget:
+    """Request lewat Flask test client; satu client per worker."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, first_chunk=False):
+        if first_chunk:
+            # Stream tak berujung (SSE): cukup baca bingkai pertama lalu putuskan
+            response = self.client.open(path, method=method, buffered=False)
+            try:
+                return response.status_code, next(iter(response.response), b'')
+            finally:
+                response.close()
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+class HTTPTarget:
+    """Request HTTP/1.1 keep-alive ke server yang sedang berjalan; satu koneksi per worker."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.address = (parts.hostname, parts.port or 80)
+        self.connection = http.client.HTTPConnection(*self.address, timeout=30)
+
+    def request(self, method, path, body=None, first_chunk=False):
+        if first_chunk:
+            # Koneksi terpisah agar koneksi keep-alive worker tidak tertahan stream
+            connection = http.client.HTTPConnection(*self.address, timeout=30)
+            try:
+                connection.request(method, path)
+                response = connection.getresponse()
+                return response.status, response.read1()
+            finally:
+                connection.close()
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close() # koneksi dibuka ulang otomatis pada request berikutnya
+            raise
+
+
+# --- Operasi per Mix ---
+
+class Catalog:
+    """ID yang ada di database saat run dimulai, dibagi semua worker."""
+
+    def __init__(self, rng, hot_fraction):
+        self.book_ids = [row[0] for row in db.session.query(Book.id)]
+        self.member_ids = [row[0] for row in db.session.query(Member.id)]
+        self.author_ids = [row[0] for row in db.session.query(Author.id)]
+        self.category_ids = [row[0] for row in db.session.query(Category.id)]
+        if not self.book_ids or not self.member_ids:
+            raise SystemExit('Catalog is empty; run `bench/loadtest.py seed` first.')
+        hot_count = max(1, int(len(self.book_ids) * hot_fraction))
+        self.hot_book_ids = rng.sample(self.book_ids, hot_count)
+        self.open_loans = [row[0] for row in db.session.query(Borrowing.id).filter(Borrowing.status != 'dikembalikan')]
+        self.lock = threading.Lock()
+
+    def take_open_loan(self, rng):
+        with self.lock:
+            if not self.open_loans:
+                return None
+            index = rng.randrange(len(self.open_loans))
+            self.open_loans[index], self.open_loans[-1] = self.open_loans[-1], self.open_loans[index]
+            return self.open_loans.pop()
+
+    def add_open_loan(self, loan_id):
+        with self.lock:
+            self.open_loans.append(loan_id)
+
+class Worker:
+    def __init__(self, index, target, catalog, run_id, seed):
+        self.index = index
+        self.target = target
+        self.catalog = catalog
+        self.run_id = run_id
+        self.rng = random.Random(seed * 1000 + index)
+        self.counter = 0
+        self.samples = [] # (operasi, status, latensi detik)
+        self.errors = 0
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f'{prefix} {self.run_id}-{self.index}-{self.counter}'
+
+    def call(self, operation, method, path, body=None, first_chunk=False):
+        started = time.perf_counter()
+        try:
+            status, raw = self.target.request(method, path, body, first_chunk)
+        except (OSError, http.client.HTTPException):
+            self.samples.append((operation, 'connection_error', time.perf_counter() - started))
+            return None, None
+        self.samples.append((operation, status, time.perf_counter() - started))
+        try:
+            data = json.loads(raw) if raw and 200 <= status < 300 else None
+        except ValueError:
+            data = None
+        return status, data
+
+    # Katalog
+    def list_books(self):
+        args = self.rng.choice([
+            'limit=50', 'limit=20&sort=-tanggal_dibuat', 'in_stock=1&limit=50', 'sort=judul&limit=100',
+            f'category_id={self.rng.choice(self.catalog.category_ids)}&limit=50',
+            f'author_id={self.rng.choice(self.catalog.author_ids)}&expand=author,category'
+        ])
+        return self.call('GET /books', 'GET', f'/books?{args}')
+
+    def get_book(self):
+        return self.call('GET /books/<id>', 'GET', f'/books/{self.rng.choice(self.catalog.book_ids)}?expand=author,category')
+
+    def list_authors(self):
+        return self.call('GET /authors', 'GET', '/authors?limit=100')
+
+    def list_categories(self):
+        return self.call('GET /categories', 'GET', '/categories')
+
+    def search(self):
+        return self.call('GET /search', 'GET', f'/search?q=buku+{self.rng.randint(1, 99)}&type=books&limit=20')
+
+    def stats_report(self):
+        report = self.rng.choice(['loans-per-day', 'top-books', 'active-loans', 'stock-out', 'categories'])
+        return self.call('GET /stats/<report>', 'GET', f'/stats/{report}')
+
+    # Sirkulasi
+    def borrow_hot(self):
+        body = {
+            'book_id': self.rng.choice(self.catalog.hot_book_ids),
+            'member_id': self.rng.choice(self.catalog.member_ids),
+            'durasi_peminjaman_hari': 14
+        }
+        status, data = self.call('POST /borrowings', 'POST', '/borrowings', body)
+        if status == 201 and data:
+            self.catalog.add_open_loan(data['id'])
+
+    def return_loan(self):
+        loan_id = self.catalog.take_open_loan(self.rng)
+        if loan_id is None:
+            return self.borrow_hot()
+        return self.call('PUT /borrowings/<id>', 'PUT', f'/borrowings/{loan_id}', {'status': 'dikembalikan'})
+
+    def desk_checkout(self):
+        # Meja sirkulasi: satu anggota meminjam beberapa buku sekaligus, lalu mengembalikannya
+        book_ids = self.rng.sample(self.catalog.book_ids, 3)
+        body = {'member_id': self.rng.choice(self.catalog.member_ids), 'book_ids': book_ids, 'durasi_peminjaman_hari': 14}
+        status, data = self.call('POST /borrowings/checkout', 'POST', '/borrowings/checkout?mode=best_effort', body)
+        if status in (201, 207) and data:
+            loan_ids = [result['borrowing']['id'] for result in data['results'] if result['status'] == 'borrowed']
+            self.call('POST /borrowings/checkin', 'POST', '/borrowings/checkin', {'borrowing_ids': loan_ids})
+
+    def member_loans(self):
+        member_id = self.rng.choice(self.catalog.member_ids)
+        return self.call('GET /borrowings', 'GET', f'/borrowings?member_id={member_id}&status=dipinjam&expand=book')
+
+    def member_history(self):
+        # Riwayat lengkap anggota, lintas tabel aktif dan arsip
+        member_id = self.rng.choice(self.catalog.member_ids)
+        return self.call('GET /borrowings/history', 'GET', f'/borrowings/history?member_id={member_id}&sort=-id&limit=50')
+
+    def list_overdue(self):
+        return self.call('GET /borrowings/overdue', 'GET', '/borrowings/overdue?limit=50&expand=member')
+
+    # Pendaftaran anggota
+    def register_member(self):
+        name = self.unique('Anggota')
+        body = {'nama': name, 'telepon': name.replace(' ', '-'), 'alamat': 'Jl. Beban Uji'}
+        status, data = self.call('POST /members', 'POST', '/members', body)
+        if status == 201 and data:
+            self.catalog.member_ids.append(data['id'])
+
+    def get_member(self):
+        return self.call('GET /members/<id>', 'GET', f'/members/{self.rng.choice(self.catalog.member_ids)}')
+
+    def update_member(self):
+        body = {'alamat': f'Jl. Baru {self.rng.randint(1, 999)}'}
+        return self.call('PUT /members/<id>', 'PUT', f'/members/{self.rng.choice(self.catalog.member_ids)}', body)
+
+    def list_members(self):
+        return self.call('GET /members', 'GET', '/members?limit=50&sort=-tanggal_dibuat')
+
+    # Endpoint lain (mix full): admin, bulk, sinkronisasi, observabilitas
+    def author_lifecycle(self):
+        status, data = self.call('POST /authors', 'POST', '/authors', {'nama': self.unique('Penulis')})
+        if status != 201 or not data:
+            return
+        path = f"/authors/{data['id']}"
+        self.call('GET /authors/<id>', 'GET', path)
+        self.call('PUT /authors/<id>', 'PUT', path, {'nama': self.unique('Penulis')})
+        self.call('DELETE /authors/<id>', 'DELETE', path)
+
+    def category_lifecycle(self):
+        status, data = self.call('POST /categories', 'POST', '/categories', {'nama': self.unique('Kategori')})
+        if status != 201 or not data:
+            return
+        path = f"/categories/{data['id']}"
+        self.call('GET /categories/<id>', 'GET', path)
+        self.call('PUT /categories/<id>', 'PUT', path, {'nama': self.unique('Kategori')})
+        self.call('DELETE /categories/<id>', 'DELETE', path)
+
+    def book_lifecycle(self):
+        body = {
+            'judul': self.unique('Buku'),
+            'author_id': self.rng.choice(self.catalog.author_ids),
+            'category_id': self.rng.choice(self.catalog.category_ids),
+            'stok': 3
+        }
+        status, data = self.call('POST /books', 'POST', '/books', body)
+        if status != 201 or not data:
+            return
+        path = f"/books/{data['id']}"
+        self.call('PUT /books/<id>', 'PUT', path, {'stok': 5})
+        self.call('DELETE /books/<id>', 'DELETE', path)
+
+    def member_delete(self):
+        name = self.unique('Anggota')
+        status, data = self.call('POST /members', 'POST', '/members', {'nama': name, 'telepon': name.replace(' ', '-')})
+        if status == 201 and data:
+            self.call('DELETE /members/<id>', 'DELETE', f"/members/{data['id']}")
+
+    def borrowing_lifecycle(self):
+        body = {'book_id': self.rng.choice(self.catalog.book_ids), 'member_id': self.rng.choice(self.catalog.member_ids), 'durasi_peminjaman_hari': 7}
+        status, data = self.call('POST /borrowings', 'POST', '/borrowings', body)
+        if status == 201 and data:
+            path = f"/borrowings/{data['id']}"
+            self.call('GET /borrowings/<id>', 'GET', path)
+            self.call('DELETE /borrowings/<id>', 'DELETE', path)
+
+    def bulk_import(self):
+        books = [
+            {'judul': self.unique('Buku Bulk'), 'author_id': self.rng.choice(self.catalog.author_ids),
+             'category_id': self.rng.choice(self.catalog.category_ids), 'stok': 2}
+            for _ in range(20)
+        ]
+        self.call('POST /books/bulk', 'POST', '/books/bulk?mode=best_effort', books)
+        members = []
+        for _ in range(20):
+            name = self.unique('Anggota Bulk')
+            members.append({'nama': name, 'telepon': name.replace(' ', '-')})
+        self.call('POST /members/bulk', 'POST', '/members/bulk?mode=best_effort', members)
+        loans = [
+            {'book_id': self.rng.choice(self.catalog.book_ids), 'member_id': self.rng.choice(self.catalog.member_ids), 'durasi_peminjaman_hari': 14}
+            for _ in range(5)
+        ]
+        self.call('POST /borrowings/bulk', 'POST', '/borrowings/bulk?mode=best_effort', loans)
+
+    def overdue_sweep(self):
+        self.call('GET /borrowings/overdue/sweep', 'GET', '/borrowings/overdue/sweep')
+        self.call('POST /borrowings/overdue/sweep', 'POST', '/borrowings/overdue/sweep')
+
+    def archive_run(self):
+        self.call('GET /borrowings/archive', 'GET', '/borrowings/archive')
+        self.call('POST /borrowings/archive', 'POST', '/borrowings/archive')
+
+    def sync_feed(self):
+        entity = self.rng.choice(['authors', 'categories', 'books', 'members', 'borrowings'])
+        return self.call('GET /changes/<entity>', 'GET', f'/changes/{entity}?limit=100')
+
+    def observability(self):
+        self.call('GET /cache/stats', 'GET', '/cache/stats')
+        self.call('GET /metrics', 'GET', '/metrics')
+
+    def live_events(self):
+        # Terminal yang (ulang) berlangganan live update; waktu sampai bingkai pertama diterima
+        return self.call('GET /events', 'GET', '/events', first_chunk=True)
+
+    def frontend(self):
+        return self.call('GET /', 'GET', '/')
+
+    def stream_books(self):
+        return self.call('GET /books?stream=1', 'GET', '/books?stream=1&limit=500')
+
+
+MIXES = {
+    'browse': [
+        ('list_books', 40), ('get_book', 25), ('search', 10), ('list_categories', 8),
+        ('list_authors', 7), ('stats_report', 5), ('stream_books', 5)
+    ],
+    'circulation': [
+        ('borrow_hot', 30), ('return_loan', 25), ('desk_checkout', 10), ('member_loans', 15), ('get_book', 10),
+        ('list_overdue', 10), ('member_history', 5)
+    ],
+    'registration': [
+        ('register_member', 40), ('get_member', 30), ('update_member', 15), ('list_members', 15)
+    ],
+    'full': [
+        ('list_books', 12), ('get_book', 10), ('search', 5), ('list_categories', 3), ('list_authors', 3),
+        ('stats_report', 4), ('stream_books', 2), ('borrow_hot', 8), ('return_loan', 7), ('member_loans', 4),
+        ('list_overdue', 3), ('desk_checkout', 2), ('register_member', 5), ('get_member', 4), ('update_member', 3), ('list_members', 3),
+        ('author_lifecycle', 2), ('category_lifecycle', 2), ('book_lifecycle', 3), ('member_delete', 2),
+        ('borrowing_lifecycle', 3), ('bulk_import', 1), ('overdue_sweep', 1), ('archive_run', 1), ('member_history', 2), ('sync_feed', 3),
+        ('observability', 1), ('live_events', 1), ('frontend', 1)
+    ]
+}
+
+
+# --- Menjalankan Mix & Laporan ---
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for _, status, latency in samples)
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(count for status, count in statuses.items() if status == 'connection_error' or int(status) >= 500)
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            name: round(percentile(latencies, pct) * 1000, 2) if latencies else None
+            for name, pct in (('p50', 50), ('p95', 95), ('p99', 99))
+        },
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'statuses': dict(sorted(statuses.items()))
+    }
+
+def endpoint_coverage(app, operations):
+    """Pasangan 'METHOD /rule' milik app yang tidak disentuh operasi mana pun."""
+    expected = set()
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == 'static':
+            continue
+        path = rule.rule
+        for converter in ('<int:', '<string:'):
+            path = path.replace(converter, '<')
+        path = path.replace('<book_id>', '<id>').replace('<author_id>', '<id>').replace('<category_id>', '<id>')
+        path = path.replace('<member_id>', '<id>').replace('<borrowing_id>', '<id>')
+        for method in rule.methods - {'HEAD', 'OPTIONS'}:
+            expected.add(f'{method} {path}')
+    touched = {operation.split('?')[0] for operation in operations}
+    return sorted(expected - touched)
+
+def run(args):
+    app = create_app({'OVERDUE_SWEEP_ENABLED': False, 'ARCHIVE_ENABLED': False})
+    rng = random.Random(args.seed)
+    with app.app_context():
+        catalog = Catalog(rng, args.hot_fraction)
+        dialect = db.engine.dialect.name
+
+    names, weights = zip(*MIXES[args.mix])
+    run_id = f'{int(time.time())}-{os.getpid()}'
+    workers = [
+        Worker(index, HTTPTarget(args.url) if args.url else InProcessTarget(app), catalog, run_id, args.seed)
+        for index in range(args.concurrency)
+    ]
+    budget = {'remaining': args.requests}
+    budget_lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def drive(worker):
+        while time.monotonic() < deadline:
+            if args.requests:
+                with budget_lock:
+                    if budget['remaining'] <= 0:
+                        return
+                    budget['remaining'] -= 1
+            operation = worker.rng.choices(names, weights)[0]
+            getattr(worker, operation)()
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=drive, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    samples = [sample for worker in workers for sample in worker.samples]
+    by_operation = {}
+    for sample in samples:
+        by_operation.setdefault(sample[0], []).append(sample)
+
+    result = {
+        'mix': args.mix,
+        'target': args.url or 'in-process',
+        'dialect': dialect,
+        'concurrency': args.concurrency,
+        'duration_s': round(elapsed, 3),
+        'seed': args.seed,
+        'overall': summarize(samples, elapsed),
+        'operations': {operation: summarize(items, elapsed) for operation, items in sorted(by_operation.items())}
+    }
+    if args.mix == 'full':
+        result['uncovered_endpoints'] = endpoint_coverage(app, by_operation)
+
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            f.write(output + '\n')
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), result, args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION: {line}', file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+        print('No regressions against baseline.', file=sys.stderr)
+
+def compare(baseline, current, tolerance):
+    """Daftar regresi current terhadap baseline (kosong jika lolos)."""
+    if (baseline['mix'], baseline['dialect'], baseline['concurrency']) != (current['mix'], current['dialect'], current['concurrency']):
+        return [f"baseline was recorded with mix={baseline['mix']} dialect={baseline['dialect']} "
+                f"concurrency={baseline['concurrency']}; rerun with the same settings"]
+    regressions = []
+    base, now = baseline['overall'], current['overall']
+    if now['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+        regressions.append(f"throughput {now['throughput_rps']} rps < baseline {base['throughput_rps']} rps")
+    if now['error_rate'] > base['error_rate'] + 0.01:
+        regressions.append(f"error rate {now['error_rate']} > baseline {base['error_rate']}")
+    for operation, base_op in baseline['operations'].items():
+        now_op = current['operations'].get(operation)
+        if now_op is None or min(base_op['requests'], now_op['requests']) < MIN_SAMPLES_FOR_COMPARISON:
+            continue
+        base_p95, now_p95 = base_op['latency_ms']['p95'], now_op['latency_ms']['p95']
+        if now_p95 > base_p95 * (1 + tolerance):
+            regressions.append(f'{operation}: p95 {now_p95} ms > baseline {base_p95} ms')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test API perpustakaan.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help='Isi database dengan katalog sintetis.')
+    seed_parser.add_argument('--authors', type=int, default=200)
+    seed_parser.add_argument('--categories', type=int, default=20)
+    seed_parser.add_argument('--books', type=int, default=5000)
+    seed_parser.add_argument('--members', type=int, default=1000)
+    seed_parser.add_argument('--borrowings', type=int, default=10000)
+    seed_parser.add_argument('--returned-ratio', type=float, default=0.8, help='Porsi peminjaman yang sudah dikembalikan.')
+    seed_parser.add_argument('--seed', type=int, default=42)
+    seed_parser.add_argument('--reset', action='store_true', help='Hapus semua tabel sebelum seed.')
+
+    run_parser = commands.add_parser('run', help='Jalankan satu mix trafik.')
+    run_parser.add_argument('--mix', choices=sorted(MIXES), default='browse')
+    run_parser.add_argument('--url', help='Server target; tanpa ini request dijalankan in-process.')
+    run_parser.add_argument('--concurrency', type=int, default=8)
+    run_parser.add_argument('--duration', type=float, default=30.0, help='Lama run dalam detik.')
+    run_parser.add_argument('--requests', type=int, default=0, help='Batasi jumlah operasi (0 = sampai durasi habis).')
+    run_parser.add_argument('--hot-fraction', type=float, default=0.01, help='Porsi judul "populer" untuk burst peminjaman.')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--output', help='Simpan hasil JSON ke file.')
+    run_parser.add_argument('--save-baseline', help='Simpan hasil sebagai baseline.')
+    run_parser.add_argument('--baseline', help='Bandingkan dengan baseline; exit 1 jika ada regresi.')
+    run_parser.add_argument('--tolerance', type=float, default=0.2, help='Toleransi regresi relatif (0.2 = 20%%).')
+
+    args = parser.parse_args(argv)
+    if args.command == 'seed':
+        seed(args)
+    else:
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
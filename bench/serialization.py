@@ -0,0 +1,126 @@
+# bench/serialization.py
+
+"""Microbenchmark serialisasi list: to_dict() + json stdlib vs serializer terkompilasi.
+
+Mode default memakai data sintetis di memori (tanpa query), sehingga yang diukur murni
+pembentukan dict + encode JSON. Dengan --database, baris dibaca dari database yang
+dikonfigurasi di app.py (read-only) sehingga biaya memuat instance ORM vs tuple kolom
+ikut terukur. Keluaran kedua jalur selalu dibandingkan byte per byte sebelum diukur.
+
+    python bench/serialization.py --rows 10000 --repeat 5
+    python bench/serialization.py --model borrowings --expand book,member --database
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, json_backend, Author, Book, Borrowing, Category, Member # noqa: E402
+from serializers import StdlibJSON, compile_serializer # noqa: E402
+
+MODELS = {'authors': Author, 'categories': Category, 'books': Book, 'members': Member, 'borrowings': Borrowing}
+
+
+def synthetic_rows(model, count):
+    """Instance transient (tidak disimpan) lengkap dengan relasinya."""
+    now = datetime(2024, 5, 1, 8, 30, 15, 123456)
+    author = Author(id=1, nama='Pramoedya Ananta Toer', tanggal_lahir=date(1925, 2, 6), tanggal_dibuat=now, tanggal_diupdate=now)
+    category = Category(id=1, nama='Fiksi', tanggal_dibuat=now, tanggal_diupdate=now)
+    member = Member(id=1, nama='Budi', alamat='Jl. Merdeka 1', telepon='0811', email='budi@example.com', tanggal_dibuat=now, tanggal_diupdate=now)
+    rows = []
+    for i in range(1, count + 1):
+        stamp = now + timedelta(seconds=i)
+        book = Book(id=i, judul=f'Buku {i}', tahun_terbit=1980 + i % 40, isbn=f'978{i:010d}', stok=i % 7,
+                    author_id=1, category_id=1, author=author, category=category, tanggal_dibuat=stamp, tanggal_diupdate=stamp)
+        if model is Book:
+            rows.append(book)
+        elif model is Borrowing:
+            rows.append(Borrowing(id=i, book_id=i, member_id=1, book=book, member=member, status='dipinjam',
+                                  tanggal_peminjaman=stamp, tanggal_kembali_seharusnya=stamp.date() + timedelta(days=14),
+                                  tanggal_dibuat=stamp, tanggal_diupdate=stamp))
+        elif model is Author:
+            rows.append(Author(id=i, nama=f'Penulis {i}', tanggal_lahir=date(1950, 1, 1) + timedelta(days=i), tanggal_dibuat=stamp, tanggal_diupdate=stamp))
+        elif model is Category:
+            rows.append(Category(id=i, nama=f'Kategori {i}', tanggal_dibuat=stamp, tanggal_diupdate=stamp))
+        else:
+            rows.append(Member(id=i, nama=f'Anggota {i}', telepon=f'08{i:09d}', tanggal_dibuat=stamp, tanggal_diupdate=stamp))
+    return rows
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Microbenchmark serializer list API perpustakaan.')
+    parser.add_argument('--model', choices=sorted(MODELS), default='books')
+    parser.add_argument('--expand', default='', help='Relasi yang di-embed, mis. author,category')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database', action='store_true', help='Baca baris dari database (ikut mengukur biaya load).')
+    args = parser.parse_args(argv)
+
+    model = MODELS[args.model]
+    expand = tuple(name for name in args.expand.split(',') if name)
+    serializer = compile_serializer(model, expand)
+    stdlib = StdlibJSON()
+
+    def baseline_encode(objs):
+        return stdlib.dumps([obj.to_dict(expand) if expand else obj.to_dict() for obj in objs])
+
+    def fast_encode(rows):
+        return json_backend.dumps([serializer.serialize(row) for row in rows])
+
+    with app.app_context():
+        if args.database:
+            def load_orm():
+                db.session.expunge_all()
+                query = model.query.order_by(model.id).limit(args.rows)
+                for name in expand:
+                    query = query.options(db.selectinload(getattr(model, name)))
+                return baseline_encode(query.all())
+
+            def load_rows():
+                return fast_encode(serializer.project(model.query).order_by(model.id).limit(args.rows).all())
+
+            baseline_time, baseline = best_of(args.repeat, load_orm)
+            fast_time, fast = best_of(args.repeat, load_rows)
+            count = len(json.loads(baseline))
+        else:
+            objs = synthetic_rows(model, args.rows)
+            rows = [serializer.row_from_instance(obj) for obj in objs]
+            baseline_time, baseline = best_of(args.repeat, lambda: baseline_encode(objs))
+            fast_time, fast = best_of(args.repeat, lambda: fast_encode(rows))
+            count = len(objs)
+        backend_name = json_backend.name
+
+    if fast != baseline:
+        raise SystemExit('Output serializer cepat berbeda dengan to_dict() + json stdlib.')
+
+    result = {
+        'model': args.model,
+        'expand': list(expand),
+        'rows': count,
+        'source': 'database' if args.database else 'synthetic',
+        'json_backend': backend_name,
+        'to_dict_ms': round(baseline_time * 1000, 2),
+        'compiled_ms': round(fast_time * 1000, 2),
+        'speedup': round(baseline_time / fast_time, 2) if fast_time else None,
+        'bytes': len(fast),
+        'byte_identical': True
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# bench/startup.py
+
+"""Benchmark cold start: waktu yang dibutuhkan proses baru (mis. worker yang di-recycle)
+sampai siap dan sampai selesai melayani request pertama.
+
+Setiap percobaan berjalan di subprocess terpisah agar modul dan pool benar-benar dingin.
+Memakai database dari konfigurasi/environment (DATABASE_URL), sama seperti app:
+
+    python bench/startup.py --runs 10 --path /books?limit=1
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({'OVERDUE_SWEEP_ENABLED': False, 'ARCHIVE_ENABLED': False})
+created = time.perf_counter()
+status = app.test_client().get(sys.argv[1]).status_code
+served = time.perf_counter()
+print(json.dumps({'import': imported - started, 'create_app': created - imported,
+                  'first_request': served - created, 'total': served - started, 'status': status}))
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark cold start API perpustakaan.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/books?limit=1')
+    args = parser.parse_args(argv)
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE, args.path],
+            cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    result = {'runs': args.runs, 'path': args.path, 'statuses': sorted({sample['status'] for sample in samples})}
+    for phase in ('import', 'create_app', 'first_request', 'total'):
+        result[f'{phase}_ms_median'] = round(statistics.median(sample[phase] for sample in samples) * 1000, 2)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+# bench/stress.py
+
+"""Stress test konkurensi akuntansi stok: banyak thread meminjam, mengembalikan, checkout,
+checkin, bulk import dan menghapus peminjaman pada beberapa judul yang sama sekaligus.
+
+Selama run, stok buku uji di-sampling terus-menerus; setelah run dicek bahwa stok tidak
+pernah negatif dan stok akhir = stok awal - peminjaman yang masih terbuka (serta counter
+stat_buku.sedang_dipinjam sama dengan jumlah peminjaman terbuka). Keluar dengan status 1
+jika ada pelanggaran atau respons 5xx. Database diambil dari konfigurasi app seperti
+bench/loadtest.py; tanpa --url request dijalankan in-process lewat Flask test client.
+
+    DATABASE_URL=sqlite:////tmp/stress.db python bench/stress.py --threads 16 --duration 20
+    python bench/stress.py --url http://127.0.0.1:5000 --threads 32 --books 3 --stock 2
+"""
+
+import argparse
+from collections import Counter
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest import HTTPTarget, InProcessTarget # noqa: E402
+from sqlalchemy import func, insert # noqa: E402
+
+from app import Author, Book, Borrowing, Category, Member, StatBuku, create_app, db # noqa: E402
+
+
+# --- Data Uji ---
+
+def create_fixtures(app, run_id, books, stock, members):
+    """Buku uji dengan stok awal yang sama dan beberapa anggota, khusus untuk run ini."""
+    with app.app_context():
+        db.create_all()
+        author = Author(nama=f'Stress {run_id}')
+        category = Category(nama=f'Stress {run_id}')
+        db.session.add_all([author, category])
+        db.session.flush()
+        db.session.execute(insert(Book), [
+            {'judul': f'Stress {run_id} #{i}', 'stok': stock, 'author_id': author.id, 'category_id': category.id}
+            for i in range(books)
+        ])
+        db.session.execute(insert(Member), [
+            {'nama': f'Stress {run_id} #{i}', 'telepon': f'stress-{run_id}-{i}'} for i in range(members)
+        ])
+        book_ids = [book_id for (book_id,) in db.session.query(Book.id).filter(Book.author_id == author.id).order_by(Book.id)]
+        member_ids = [member_id for (member_id,) in db.session.query(Member.id).filter(Member.telepon.like(f'stress-{run_id}-%'))]
+        db.session.commit()
+    return book_ids, member_ids
+
+
+# --- Operasi Stress ---
+
+class Loans:
+    """ID peminjaman terbuka yang diketahui, dibagi semua thread."""
+
+    def __init__(self):
+        self.ids = []
+        self.lock = threading.Lock()
+
+    def add(self, ids):
+        with self.lock:
+            self.ids.extend(ids)
+
+    def take(self, rng, count=1, keep=False):
+        # keep=True: ID tidak dikeluarkan, jadi thread lain bisa memproses peminjaman yang sama bersamaan
+        with self.lock:
+            picked = rng.sample(self.ids, min(count, len(self.ids)))
+            if not keep:
+                for loan_id in picked:
+                    self.ids.remove(loan_id)
+            return picked
+
+
+class Worker:
+    def __init__(self, index, target, book_ids, member_ids, loans, seed):
+        self.target = target
+        self.book_ids = book_ids
+        self.member_ids = member_ids
+        self.loans = loans
+        self.rng = random.Random(seed * 1000 + index)
+        self.statuses = Counter()
+
+    def call(self, operation, method, path, body=None):
+        status, raw = self.target.request(method, path, body)
+        self.statuses[(operation, status)] += 1
+        return status, json.loads(raw) if raw and 200 <= status < 300 else None
+
+    def borrow(self):
+        body = {'book_id': self.rng.choice(self.book_ids), 'member_id': self.rng.choice(self.member_ids), 'durasi_peminjaman_hari': 7}
+        status, data = self.call('borrow', 'POST', '/borrowings', body)
+        if status == 201:
+            self.loans.add([data['id']])
+
+    def return_loan(self):
+        # Sebagian pengembalian sengaja ganda/bersamaan: stok hanya boleh bertambah sekali
+        for loan_id in self.loans.take(self.rng, keep=self.rng.random() < 0.3):
+            self.call('return', 'PUT', f'/borrowings/{loan_id}', {'status': 'dikembalikan'})
+
+    def checkout(self):
+        body = {
+            'member_id': self.rng.choice(self.member_ids),
+            'book_ids': [self.rng.choice(self.book_ids) for _ in range(self.rng.randint(1, 4))],
+            'durasi_peminjaman_hari': 7
+        }
+        status, data = self.call('checkout', 'POST', '/borrowings/checkout?mode=best_effort', body)
+        if status in (201, 207):
+            self.loans.add([result['borrowing']['id'] for result in data['results'] if result['status'] == 'borrowed'])
+
+    def checkin(self):
+        loan_ids = self.loans.take(self.rng, self.rng.randint(1, 4), keep=self.rng.random() < 0.3)
+        if loan_ids:
+            self.call('checkin', 'POST', '/borrowings/checkin?mode=best_effort', {'borrowing_ids': loan_ids})
+
+    def bulk(self):
+        rows = [
+            {'book_id': self.rng.choice(self.book_ids), 'member_id': self.rng.choice(self.member_ids), 'durasi_peminjaman_hari': 7}
+            for _ in range(self.rng.randint(1, 4))
+        ]
+        status, data = self.call('bulk', 'POST', '/borrowings/bulk?mode=best_effort&chunk_size=1', rows)
+        if status in (201, 207):
+            self.loans.add([result['id'] for result in data['results'] if result['status'] == 'created' and result['id']])
+
+    def delete(self):
+        for loan_id in self.loans.take(self.rng):
+            self.call('delete', 'DELETE', f'/borrowings/{loan_id}')
+
+
+OPERATIONS = [('borrow', 4), ('return_loan', 4), ('checkout', 2), ('checkin', 2), ('bulk', 1), ('delete', 1)]
+
+
+# --- Verifikasi ---
+
+def stock_levels(book_ids):
+    return dict(db.session.query(Book.id, Book.stok).filter(Book.id.in_(book_ids)))
+
+def verify(app, book_ids, stock, min_seen):
+    """Daftar pelanggaran invarian stok (kosong jika lolos)."""
+    violations = []
+    with app.app_context():
+        final = stock_levels(book_ids)
+        open_loans = dict(
+            db.session.query(Borrowing.book_id, func.count(Borrowing.id))
+            .filter(Borrowing.book_id.in_(book_ids), Borrowing.tanggal_pengembalian_aktual.is_(None))
+            .group_by(Borrowing.book_id)
+        )
+        active = dict(db.session.query(StatBuku.book_id, StatBuku.sedang_dipinjam).filter(StatBuku.book_id.in_(book_ids)))
+    for book_id in book_ids:
+        loans = open_loans.get(book_id, 0)
+        if min_seen.get(book_id, 0) < 0:
+            violations.append(f'book {book_id}: stock went negative ({min_seen[book_id]})')
+        if final[book_id] != stock - loans:
+            violations.append(f'book {book_id}: final stock {final[book_id]} != initial {stock} - open loans {loans}')
+        if active.get(book_id, 0) != loans:
+            violations.append(f'book {book_id}: stat_buku.sedang_dipinjam {active.get(book_id, 0)} != open loans {loans}')
+    return violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stress test konkurensi stok API perpustakaan.')
+    parser.add_argument('--url', help='Server yang sedang berjalan; default in-process (Flask test client).')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0, help='Detik.')
+    parser.add_argument('--books', type=int, default=5, help='Jumlah judul yang diperebutkan.')
+    parser.add_argument('--stock', type=int, default=3, help='Stok awal per judul.')
+    parser.add_argument('--members', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    app = create_app({'OVERDUE_SWEEP_ENABLED': False, 'ARCHIVE_ENABLED': False})
+    run_id = f'{int(time.time())}-{os.getpid()}'
+    book_ids, member_ids = create_fixtures(app, run_id, args.books, args.stock, args.members)
+    loans = Loans()
+    workers = [
+        Worker(index, HTTPTarget(args.url) if args.url else InProcessTarget(app), book_ids, member_ids, loans, args.seed)
+        for index in range(args.threads)
+    ]
+    names, weights = zip(*OPERATIONS)
+    deadline = time.monotonic() + args.duration
+    min_seen = {}
+    running = threading.Event()
+    running.set()
+
+    def drive(worker):
+        while time.monotonic() < deadline:
+            getattr(worker, worker.rng.choices(names, weights)[0])()
+
+    def sample_stock():
+        # Stok yang ter-commit tidak boleh negatif kapan pun, bukan hanya di akhir
+        with app.app_context():
+            while running.is_set():
+                for book_id, stok in stock_levels(book_ids).items():
+                    min_seen[book_id] = min(min_seen.get(book_id, stok), stok)
+                db.session.rollback()
+                time.sleep(0.01)
+
+    sampler = threading.Thread(target=sample_stock)
+    sampler.start()
+    threads = [threading.Thread(target=drive, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    running.clear()
+    sampler.join()
+
+    statuses = Counter()
+    for worker in workers:
+        statuses.update(worker.statuses)
+    server_errors = sum(count for (_, status), count in statuses.items() if status >= 500)
+    violations = verify(app, book_ids, args.stock, min_seen)
+    result = {
+        'target': args.url or 'in-process',
+        'threads': args.threads,
+        'books': book_ids,
+        'initial_stock': args.stock,
+        'min_stock_seen': min_seen,
+        'requests': sum(statuses.values()),
+        'server_errors': server_errors,
+        'statuses': {f'{operation} {status}': count for (operation, status), count in sorted(statuses.items())},
+        'violations': violations
+    }
+    print(json.dumps(result, indent=2))
+    if violations or server_errors:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
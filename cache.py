@@ -0,0 +1,216 @@
+# cache.py
+
+"""Cache baca untuk payload katalog.
+
+Backend default adalah LRU + TTL in-process. Backend kompatibel Redis bisa dipakai
+lewat konfigurasi CACHE_BACKEND = 'redis'; client-nya bisa diganti fake lokal saat testing.
+Setiap entri diberi tag (mis. 'book:5', 'books', 'category:3') sehingga invalidasi
+dari handler tulis bisa tepat sasaran, termasuk kaskade ke payload yang meng-embed entitas lain.
+
+Setiap invalidasi menaikkan generasi global dan mencatat generasi + waktunya per tag. Pengisi
+cache mengambil generation() sebelum membaca database lalu memanggil invalidated_since()
+sebelum set(): jika salah satu tag payload diinvalidasi di antaranya, payload yang mungkin
+sudah basi tidak disimpan.
+"""
+
+from collections import OrderedDict, defaultdict
+import json
+import threading
+import time
+
+
+class CacheStats:
+    """Counter hit/miss/eviction, aman dipakai dari banyak thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def to_dict(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+class MemoryCache:
+    """Cache LRU dengan TTL di memori proses (per worker)."""
+
+    backend = 'memory'
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict() # key -> (expires_at, value, tags)
+        self._tags = defaultdict(set) # tag -> {key}
+        self._generation = 0
+        self._invalidated = {} # tag -> (generasi, waktu epoch) invalidasi terakhir
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                self.stats.incr('evictions')
+                entry = None
+            if entry is None:
+                self.stats.incr('misses')
+                return None
+            self._entries.move_to_end(key)
+        self.stats.incr('hits')
+        return entry[1]
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags[tag].add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats.incr('evictions')
+
+    def invalidate_tags(self, tags):
+        removed = 0
+        with self._lock:
+            self._generation += 1
+            now = time.time()
+            for tag in tags:
+                self._invalidated[tag] = (self._generation, now)
+                for key in self._tags.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        removed += 1
+            if len(self._invalidated) > self.max_entries:
+                # Catatan yang lebih tua dari TTL tidak lagi dibutuhkan pengisi cache mana pun
+                self._invalidated = {tag: record for tag, record in self._invalidated.items() if record[1] >= now - self.ttl}
+        self.stats.incr('invalidations', removed)
+        return removed
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def invalidated_since(self, tags, generation, window=0):
+        """True jika salah satu tag diinvalidasi setelah `generation` atau dalam `window` detik terakhir."""
+        threshold = time.time() - window
+        with self._lock:
+            records = [self._invalidated.get(tag) for tag in tags]
+        return any(record and (record[0] > generation or (window and record[1] > threshold)) for record in records)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._invalidated.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache:
+    """Cache di server kompatibel Redis, dibagi antar worker.
+
+    Nilai disimpan sebagai JSON dengan SETEX; tag disimpan sebagai SET berisi key. Generasi
+    invalidasi memakai INCR bersama, jadi pengisi cache di worker mana pun ikut melihatnya.
+    `client` cukup menyediakan get/mget/incr/setex/sadd/expire/smembers/delete/scan_iter.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, client, ttl=300, prefix='perpustakaan:cache:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis # dependensi opsional, hanya dibutuhkan untuk backend ini
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.stats.incr('misses')
+            return None
+        self.stats.incr('hits')
+        return json.loads(raw)
+
+    def set(self, key, value, tags=()):
+        full_key = self.prefix + key
+        self.client.setex(full_key, self.ttl, json.dumps(value, separators=(',', ':')))
+        for tag in tags:
+            tag_key = self.prefix + 'tag:' + tag
+            self.client.sadd(tag_key, full_key)
+            self.client.expire(tag_key, self.ttl)
+
+    def invalidate_tags(self, tags):
+        removed = 0
+        record = f'{self.client.incr(self.prefix + "generation")}:{time.time()}'
+        for tag in tags:
+            tag_key = self.prefix + 'tag:' + tag
+            self.client.setex(self.prefix + 'inv:' + tag, self.ttl, record)
+            keys = self.client.smembers(tag_key)
+            if keys:
+                removed += self.client.delete(*keys)
+            self.client.delete(tag_key)
+        self.stats.incr('invalidations', removed)
+        return removed
+
+    def generation(self):
+        return int(self.client.get(self.prefix + 'generation') or 0)
+
+    def invalidated_since(self, tags, generation, window=0):
+        """True jika salah satu tag diinvalidasi setelah `generation` atau dalam `window` detik terakhir."""
+        tags = list(tags)
+        if not tags:
+            return False
+        threshold = time.time() - window
+        for raw in self.client.mget([self.prefix + 'inv:' + tag for tag in tags]):
+            if raw is not None:
+                tag_generation, invalidated_at = (raw.decode() if isinstance(raw, bytes) else raw).split(':')
+                if int(tag_generation) > generation or (window and float(invalidated_at) > threshold):
+                    return True
+        return False
+
+    def clear(self):
+        # Hanya key dengan prefix aplikasi ini yang dihapus, bukan seluruh database Redis
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+def create_cache(config):
+    """Buat backend cache dari config Flask (CACHE_BACKEND, CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_REDIS_URL)."""
+    backend = config.get('CACHE_BACKEND', 'memory')
+    ttl = config.get('CACHE_TTL', 300)
+    if backend == 'redis':
+        return RedisCache.from_url(config['CACHE_REDIS_URL'], ttl=ttl)
+    if backend == 'memory':
+        return MemoryCache(max_entries=config.get('CACHE_MAX_ENTRIES', 10000), ttl=ttl)
+    raise ValueError(f'Unknown CACHE_BACKEND: {backend}')
@@ -0,0 +1,191 @@
+# events.py
+
+"""Pub/sub event perubahan untuk live update terminal (Server-Sent Events).
+
+Handler tulis mempublikasikan event ringkas ('book.stock', 'borrowing.created', ...)
+setelah transaksinya commit; setiap koneksi /events adalah satu subscriber dengan antrean
+sendiri. Backend default adalah fan-out in-process (per worker). Backend kompatibel Redis
+(EVENTS_BACKEND = 'redis') meneruskan event antar worker lewat PUBLISH/SUBSCRIBE; client-nya
+bisa diganti fake lokal saat testing, sama seperti cache.RedisCache.
+
+Setiap event punya id '<epoch>-<urutan>' dengan urutan menaik. Event terakhir disimpan di
+buffer replay sehingga client yang tersambung ulang dengan Last-Event-ID menerima event yang
+terlewat. Jika celahnya sudah di luar buffer, id-nya berasal dari epoch lain (worker lain atau
+proses sebelum restart, yang urutannya tidak bisa dibandingkan), atau antrean subscriber penuh
+karena client terlalu lambat, client menerima event 'resync' dan sebaiknya memuat ulang datanya.
+"""
+
+from collections import deque
+import json
+import queue
+import secrets
+import threading
+
+
+def format_sse(event):
+    """Bingkai teks SSE untuk satu event (dienkode sekali, dipakai semua subscriber)."""
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append('data: ' + json.dumps(event['data'], separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+RESYNC = {'id': None, 'type': 'resync', 'data': {}}
+RESYNC['frame'] = format_sse(RESYNC)
+
+
+class Subscription:
+    """Antrean event milik satu koneksi stream."""
+
+    def __init__(self, broker, queue_size):
+        self._broker = broker
+        self._queue = queue.Queue(queue_size)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # Client terlalu lambat: buang antreannya, lalu minta client memuat ulang
+            self.overflowed = True
+
+    def get(self, timeout=None):
+        """Event berikutnya, atau None jika tidak ada event selama `timeout` detik."""
+        if self.overflowed:
+            self.overflowed = False
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            return RESYNC
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._broker.unsubscribe(self)
+
+
+class MemoryBroker:
+    """Fan-out event ke subscriber di proses ini (per worker)."""
+
+    backend = 'memory'
+
+    def __init__(self, buffer_size=1000, queue_size=1000, epoch=None):
+        self.queue_size = queue_size
+        # Acak per proses: urutan id mulai dari 1 lagi setelah restart dan berbeda di tiap worker
+        self.epoch = epoch or secrets.token_hex(4)
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = set()
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def publish(self, event_type, data):
+        return self.deliver(None, event_type, data)
+
+    def deliver(self, seq, event_type, data):
+        """Simpan event ke buffer replay dan kirim ke semua subscriber lokal.
+
+        seq None berarti urutan berikutnya dari proses ini; RedisBroker memberi urutan bersama.
+        """
+        with self._lock:
+            if seq is None:
+                seq = self._last_id + 1
+            event = {'id': f'{self.epoch}-{seq}', 'seq': seq, 'type': event_type, 'data': data}
+            event['frame'] = format_sse(event)
+            self._last_id = max(self._last_id, seq)
+            self._buffer.append(event)
+            for subscription in self._subscribers:
+                subscription.put(event)
+        return event
+
+    def _parse_event_id(self, event_id):
+        # Urutan dari id milik epoch ini, None untuk id asing/rusak
+        epoch, _, seq = event_id.rpartition('-')
+        return int(seq) if epoch == self.epoch and seq.isdigit() else None
+
+    def subscribe(self, last_event_id=None):
+        """Subscriber baru; last_event_id (teks Last-Event-ID) memutar ulang event yang terlewat."""
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                seq = self._parse_event_id(last_event_id)
+                oldest = self._buffer[0]['seq'] if self._buffer else self._last_id + 1
+                if seq is None or seq > self._last_id or seq + 1 < oldest:
+                    # Id dari proses lain / lebih baru dari proses ini, atau celahnya di luar buffer
+                    subscription.put(RESYNC)
+                else:
+                    for event in self._buffer:
+                        if event['seq'] > seq:
+                            subscription.put(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': self.backend, 'subscribers': len(self._subscribers), 'last_event_id': f'{self.epoch}-{self._last_id}'}
+
+
+class RedisBroker:
+    """Event lewat PUBLISH/SUBSCRIBE Redis, sehingga terminal di worker mana pun menerimanya.
+
+    Urutan event diambil dari INCR bersama agar sama di semua worker, dengan epoch tetap per
+    channel, sehingga client boleh tersambung ulang ke worker mana pun. Thread
+    listener baru dijalankan saat subscriber pertama datang (setelah fork), lalu
+    meneruskan pesan ke MemoryBroker lokal. `client` cukup menyediakan incr/publish/pubsub.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, client, channel='perpustakaan:events', buffer_size=1000, queue_size=1000):
+        self.client = client
+        self.channel = channel
+        self.local = MemoryBroker(buffer_size, queue_size, epoch=channel)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis # dependensi opsional, hanya dibutuhkan untuk backend ini
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def publish(self, event_type, data):
+        seq = self.client.incr(self.channel + ':seq')
+        self.client.publish(self.channel, json.dumps({'seq': seq, 'type': event_type, 'data': data}, separators=(',', ':')))
+
+    def subscribe(self, last_event_id=None):
+        with self._lock:
+            if self._listener is None:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self._listener = threading.Thread(target=self._listen, args=(pubsub,), name='events-listener', daemon=True)
+                self._listener.start()
+        return self.local.subscribe(last_event_id)
+
+    def unsubscribe(self, subscription):
+        self.local.unsubscribe(subscription)
+
+    def _listen(self, pubsub):
+        for message in pubsub.listen():
+            if message.get('type') == 'message':
+                event = json.loads(message['data'])
+                self.local.deliver(event['seq'], event['type'], event['data'])
+
+    def stats(self):
+        return dict(self.local.stats(), backend=self.backend)
+
+
+def create_broker(config):
+    """Buat broker event dari config Flask (EVENTS_BACKEND, EVENTS_REDIS_URL, EVENTS_BUFFER_SIZE, EVENTS_QUEUE_SIZE)."""
+    backend = config.get('EVENTS_BACKEND', 'memory')
+    sizes = {'buffer_size': config.get('EVENTS_BUFFER_SIZE', 1000), 'queue_size': config.get('EVENTS_QUEUE_SIZE', 1000)}
+    if backend == 'redis':
+        return RedisBroker.from_url(config['EVENTS_REDIS_URL'], **sizes)
+    if backend == 'memory':
+        return MemoryBroker(**sizes)
+    raise ValueError(f'Unknown EVENTS_BACKEND: {backend}')
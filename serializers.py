@@ -0,0 +1,158 @@
+# serializers.py
+
+"""Serializer cepat untuk respons list besar.
+
+to_dict() membutuhkan instance ORM lengkap (identity map, state tracking) dan memanggil
+method per kolom per baris. RowSerializer dikompilasi sekali per (model, expand) menjadi
+satu fungsi yang membaca tuple hasil proyeksi kolom (`query.with_entities`) dan
+membentuk dict dalam satu ekspresi literal. Skema diambil dari model.FIELDS, dengan
+urutan key dan format tanggal yang sama dengan to_dict().
+
+Encoder JSON juga bisa diganti: orjson dipakai bila terpasang, dengan keluaran byte
+yang sama dengan json.dumps(separators=(',', ':')) milik stdlib.
+"""
+
+import json
+
+from sqlalchemy import Date, DateTime
+from sqlalchemy.orm import aliased, configure_mappers
+
+
+# --- Serializer Baris ---
+
+DATE_CACHE_SIZE = 4096
+
+def _field_names(field):
+    # Entri FIELDS berupa 'kolom' atau ('key_json', 'kolom')
+    return (field, field) if isinstance(field, str) else field
+
+
+class RowSerializer:
+    """Fungsi serialisasi terkompilasi untuk satu model (+ relasi yang di-embed).
+
+    `project(query)` mengganti entitas query menjadi kolom-kolom yang dibutuhkan
+    (relasi lewat LEFT OUTER JOIN), lalu `serialize(row)` membentuk dict dari tuple-nya.
+    Kolom diberi label nama atributnya ('id', 'judul', 'author__nama'), sehingga
+    row.id / row.<kolom sort> tetap bisa dipakai untuk cursor keyset.
+    """
+
+    def __init__(self, model, expand=()):
+        self.model = model
+        self.expand = tuple(expand)
+        self.columns = []
+        self.labels = []
+        self._joins = []
+        self._dates = {}
+        self._namespace = {'_dates': self._dates, '_date_iso': self._date_iso}
+        configure_mappers() # relasi backref (mis. Borrowing.book) baru ada setelah mapper dikonfigurasi
+
+        items = self._compile_entity(model, model, '')
+        for name in self.expand:
+            relationship = getattr(model, name)
+            target = aliased(relationship.property.mapper.class_)
+            self._joins.append(relationship.of_type(target))
+            nested = self._compile_entity(relationship.property.mapper.class_, target, name + '__')
+            # LEFT OUTER JOIN tanpa pasangan -> id relasi NULL -> null, sama seperti to_dict
+            id_index = self.labels.index(name + '__id')
+            items.append(f"{name!r}: None if row[{id_index}] is None else {{{', '.join(nested)}}}")
+
+        source = f"def serialize(row):\n    return {{{', '.join(items)}}}\n"
+        exec(source, self._namespace)
+        self.source = source
+        self.serialize = self._namespace['serialize']
+
+    def _compile_entity(self, model, entity, prefix):
+        items = []
+        for field in model.FIELDS:
+            key, attribute = _field_names(field)
+            label = prefix + attribute
+            if label not in self.labels:
+                self.labels.append(label)
+                self.columns.append(getattr(entity, attribute).label(label))
+            value = f'row[{self.labels.index(label)}]'
+            column_type = model.__table__.c[attribute].type
+            # isoformat() identik dengan format to_dict untuk DATE maupun DATETIME
+            if isinstance(column_type, DateTime):
+                value = f'(None if {value} is None else {value}.isoformat())'
+            elif isinstance(column_type, Date):
+                # Nilai DATE (jatuh tempo, tanggal lahir) banyak berulang antar baris: string-nya di-cache
+                value = f'(None if {value} is None else _dates.get({value}) or _date_iso({value}))'
+            items.append(f'{key!r}: {value}')
+        return items
+
+    def _date_iso(self, value):
+        if len(self._dates) >= DATE_CACHE_SIZE:
+            self._dates.clear()
+        text = self._dates[value] = value.isoformat()
+        return text
+
+    def project(self, query):
+        query = query.with_entities(*self.columns)
+        for join in self._joins:
+            query = query.outerjoin(join)
+        return query
+
+    def row_from_instance(self, obj):
+        """Bentuk tuple kolom dari instance ORM (dipakai benchmark dan pemeriksaan kompatibilitas)."""
+        values = []
+        for label in self.labels:
+            relation, _, attribute = label.rpartition('__')
+            source = getattr(obj, relation) if relation else obj
+            values.append(getattr(source, attribute) if source is not None else None)
+        return tuple(values)
+
+
+_serializers = {}
+
+def compile_serializer(model, expand=()):
+    """RowSerializer untuk (model, expand), dikompilasi sekali lalu dipakai ulang."""
+    key = (model, tuple(expand))
+    serializer = _serializers.get(key)
+    if serializer is None:
+        serializer = _serializers[key] = RowSerializer(model, expand)
+    return serializer
+
+
+# --- Backend JSON ---
+
+class StdlibJSON:
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'))
+
+
+class OrjsonJSON:
+    """orjson dengan keluaran byte yang sama seperti StdlibJSON.
+
+    Perbedaannya dengan stdlib hanya pada karakter non-ASCII dan DEL (stdlib meng-escape
+    keduanya menjadi \\uXXXX); payload seperti itu dienkode ulang dengan stdlib.
+    """
+
+    name = 'orjson'
+
+    def __init__(self, orjson):
+        self._dumps = orjson.dumps
+        self._fallback = StdlibJSON().dumps
+
+    def dumps(self, obj):
+        raw = self._dumps(obj)
+        if raw.isascii() and b'\x7f' not in raw:
+            return raw.decode('ascii')
+        return self._fallback(obj)
+
+
+def create_json_backend(name='auto'):
+    """Buat encoder JSON kompak dari config JSON_BACKEND: 'auto', 'orjson' atau 'json'."""
+    if name in ('auto', 'orjson'):
+        try:
+            import orjson # dependensi opsional
+        except ImportError:
+            if name == 'orjson':
+                raise
+        else:
+            return OrjsonJSON(orjson)
+        return StdlibJSON()
+    if name == 'json':
+        return StdlibJSON()
+    raise ValueError(f'Unknown JSON_BACKEND: {name}')
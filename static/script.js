@@ -44,6 +44,31 @@ document.addEventListener('DOMContentLoaded', () => {
     // Base URL dari API Flask Anda
     const API_BASE_URL = 'http://127.0.0.1:5000';
 
+    // Ambil semua halaman dari endpoint list dengan mengikuti header Link rel="next" (paginasi keyset)
+    async function fetchAllPages(path) {
+        let url = `${API_BASE_URL}${path}`;
+        const items = [];
+        while (url) {
+            const response = await fetch(url);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            items.push(...await response.json());
+            const link = response.headers.get('Link');
+            const match = link ? link.match(/<([^>]+)>;\s*rel="next"/) : null;
+            url = match ? match[1] : null;
+        }
+        return items;
+    }
+
+    // --- State lokal: tabel di-patch langsung dari event /events, bukan dimuat ulang ---
+    const booksById = new Map();
+    const membersById = new Map();
+    const borrowingsById = new Map();
+    const stockVersions = new Map(); // versi stok terakhir per buku, untuk mengabaikan event yang datang terlambat
+    const loaded = { books: false, members: false, borrowings: false };
+    let liveConnected = false;
+
     // Fungsi untuk menampilkan pesan (diperbarui untuk menerima ID elemen pesan)
     function showMessage(msg, type, elementId) {
         const element = document.getElementById(elementId);
@@ -71,14 +96,14 @@ document.addEventListener('DOMContentLoaded', () => {
                 link.classList.add('active-link');
             }
         });
-        // Refresh data saat pindah section
-        if (sectionId === 'book-list') fetchBooks();
+        // Refresh data saat pindah section (jika live update aktif, cukup sekali lalu di-patch lewat event)
+        if (sectionId === 'book-list') refresh('books');
         if (sectionId === 'borrowing-management') {
-            fetchBorrowings();
-            fetchBooks(); // Untuk dropdown di form peminjaman
-            fetchMembers(); // Untuk dropdown di form peminjaman
+            refresh('borrowings');
+            refresh('books'); // Untuk dropdown di form peminjaman
+            refresh('members'); // Untuk dropdown di form peminjaman
         }
-        if (sectionId === 'member-management') fetchMembers();
+        if (sectionId === 'member-management') refresh('members');
     }
 
     // Event listener untuk link sidebar
@@ -125,8 +150,8 @@ document.addEventListener('DOMContentLoaded', () => {
         });
         // Pastikan dropdown di-refresh saat beralih ke form peminjaman
         if (subSectionId === 'new' && subSectionType === 'borrowing') {
-            fetchBooks();
-            fetchMembers();
+            refresh('books');
+            refresh('members');
         }
     }
 
@@ -152,30 +177,16 @@ document.addEventListener('DOMContentLoaded', () => {
     async function fetchBooks() {
         booksContainer.innerHTML = '<p>Memuat buku...</p>';
         try {
-            const response = await fetch(`${API_BASE_URL}/books`);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            const books = await response.json();
-            
+            const books = await fetchAllPages('/books');
+            booksById.clear();
+            books.forEach(book => booksById.set(book.id, book));
+            loaded.books = true;
+
             if (books.length === 0) {
                 booksContainer.innerHTML = '<p>Tidak ada buku yang ditemukan.</p>';
             } else {
                 booksContainer.innerHTML = '';
-                books.forEach(book => {
-                    const bookCard = document.createElement('div');
-                    bookCard.className = 'book-card';
-                    bookCard.innerHTML = `
-                        <h3>${book.judul}</h3>
-                        <p><strong>Penulis ID:</strong> ${book.author_id}</p>
-                        <p><strong>Kategori ID:</strong> ${book.category_id}</p>
-                        <p><strong>Tahun Terbit:</strong> ${book.tahun_terbit || 'N/A'}</p>
-                        <p><strong>ISBN:</strong> ${book.isbn || 'N/A'}</p>
-                        <p class="stok"><strong>Stok:</strong> ${book.stok}</p>
-                        <p><small>Ditambahkan: ${new Date(book.tanggal_dibuat).toLocaleDateString()}</small></p>
-                    `;
-                    booksContainer.appendChild(bookCard);
-                });
+                books.forEach(book => booksContainer.appendChild(createBookCard(book)));
             }
             populateBookSelect(books); 
         } catch (error) {
@@ -185,43 +196,49 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function createBookCard(book) {
+        const bookCard = document.createElement('div');
+        bookCard.className = 'book-card';
+        bookCard.dataset.bookId = book.id;
+        bookCard.innerHTML = `
+            <h3>${book.judul}</h3>
+            <p><strong>Penulis ID:</strong> ${book.author_id}</p>
+            <p><strong>Kategori ID:</strong> ${book.category_id}</p>
+            <p><strong>Tahun Terbit:</strong> ${book.tahun_terbit || 'N/A'}</p>
+            <p><strong>ISBN:</strong> ${book.isbn || 'N/A'}</p>
+            <p class="stok"><strong>Stok:</strong> ${book.stok}</p>
+            <p><small>Ditambahkan: ${new Date(book.tanggal_dibuat).toLocaleDateString()}</small></p>
+        `;
+        return bookCard;
+    }
+
+    function createBookOption(book) {
+        const option = document.createElement('option');
+        option.value = book.id;
+        option.textContent = `${book.judul} (Stok: ${book.stok})`;
+        return option;
+    }
+
     // Fungsi untuk mengisi dropdown buku di formulir peminjaman
     function populateBookSelect(books) {
         borrowBookSelect.innerHTML = '<option value="">Pilih Buku</option>';
-        books.forEach(book => {
-            const option = document.createElement('option');
-            option.value = book.id;
-            option.textContent = `${book.judul} (Stok: ${book.stok})`;
-            borrowBookSelect.appendChild(option);
-        });
+        books.forEach(book => borrowBookSelect.appendChild(createBookOption(book)));
     }
 
     // Fungsi untuk mengambil dan menampilkan daftar anggota
     async function fetchMembers() {
         membersContainer.innerHTML = '<p>Memuat anggota...</p>';
         try {
-            const response = await fetch(`${API_BASE_URL}/members`);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            const members = await response.json();
+            const members = await fetchAllPages('/members');
+            membersById.clear();
+            members.forEach(member => membersById.set(member.id, member));
+            loaded.members = true;
 
             if (members.length === 0) {
                 membersContainer.innerHTML = '<p>Tidak ada anggota yang ditemukan.</p>';
             } else {
                 membersContainer.innerHTML = '';
-                members.forEach(member => {
-                    const memberCard = document.createElement('div');
-                    memberCard.className = 'book-card'; // Menggunakan style yang sama
-                    memberCard.innerHTML = `
-                        <h3>${member.nama} (ID: ${member.id})</h3>
-                        <p><strong>Telepon:</strong> ${member.telepon}</p>
-                        <p><strong>Email:</strong> ${member.email || 'N/A'}</p>
-                        <p><strong>Alamat:</strong> ${member.alamat || 'N/A'}</p>
-                        <p><small>Bergabung: ${new Date(member.tanggal_registrasi).toLocaleDateString()}</small></p>
-                    `;
-                    membersContainer.appendChild(memberCard);
-                });
+                members.forEach(member => membersContainer.appendChild(createMemberCard(member)));
             }
             populateMemberSelect(members);
         }
@@ -232,58 +249,46 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function createMemberCard(member) {
+        const memberCard = document.createElement('div');
+        memberCard.className = 'book-card'; // Menggunakan style yang sama
+        memberCard.innerHTML = `
+            <h3>${member.nama} (ID: ${member.id})</h3>
+            <p><strong>Telepon:</strong> ${member.telepon}</p>
+            <p><strong>Email:</strong> ${member.email || 'N/A'}</p>
+            <p><strong>Alamat:</strong> ${member.alamat || 'N/A'}</p>
+            <p><small>Bergabung: ${new Date(member.tanggal_registrasi).toLocaleDateString()}</small></p>
+        `;
+        return memberCard;
+    }
+
+    function createMemberOption(member) {
+        const option = document.createElement('option');
+        option.value = member.id;
+        option.textContent = `${member.nama} (ID: ${member.id})`;
+        return option;
+    }
+
     // Fungsi untuk mengisi dropdown anggota di formulir peminjaman
     function populateMemberSelect(members) {
         borrowMemberSelect.innerHTML = '<option value="">Pilih Anggota</option>';
-        members.forEach(member => {
-            const option = document.createElement('option');
-            option.value = member.id;
-            option.textContent = `${member.nama} (ID: ${member.id})`;
-            borrowMemberSelect.appendChild(option);
-        });
+        members.forEach(member => borrowMemberSelect.appendChild(createMemberOption(member)));
     }
 
     // Fungsi untuk mengambil dan menampilkan daftar peminjaman
     async function fetchBorrowings() {
         borrowingsContainer.innerHTML = '<p>Memuat peminjaman...</p>';
         try {
-            const response = await fetch(`${API_BASE_URL}/borrowings`);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            const borrowings = await response.json();
+            const borrowings = await fetchAllPages('/borrowings?expand=book,member');
+            borrowingsById.clear();
+            borrowings.forEach(borrowing => borrowingsById.set(borrowing.id, borrowing));
+            loaded.borrowings = true;
 
             if (borrowings.length === 0) {
                 borrowingsContainer.innerHTML = '<p>Tidak ada riwayat peminjaman.</p>';
             } else {
                 borrowingsContainer.innerHTML = '';
-                borrowings.forEach(borrowing => {
-                    const borrowingCard = document.createElement('div');
-                    borrowingCard.className = 'book-card'; // Menggunakan style yang sama
-                    const tglPeminjaman = new Date(borrowing.tanggal_peminjaman).toLocaleDateString();
-                    const tglKembaliSeharusnya = new Date(borrowing.tanggal_kembali_seharusnya).toLocaleDateString();
-                    const tglPengembalianAktual = borrowing.tanggal_pengembalian_aktual ? new Date(borrowing.tanggal_pengembalian_aktual).toLocaleDateString() : 'Belum Dikembalikan';
-                    
-                    let statusClass = '';
-                    if (borrowing.status === 'dikembalikan') {
-                        statusClass = 'status-dikembalikan';
-                    } else if (borrowing.status === 'terlambat') {
-                        statusClass = 'status-terlambat';
-                    } else {
-                        statusClass = 'status-dipinjam';
-                    }
-
-                    borrowingCard.innerHTML = `
-                        <h3>Peminjaman ID: ${borrowing.id}</h3>
-                        <p><strong>Buku:</strong> ${borrowing.book ? borrowing.book.judul : 'N/A'} (ID: ${borrowing.book_id})</p>
-                        <p><strong>Anggota:</strong> ${borrowing.member ? borrowing.member.nama : 'N/A'} (ID: ${borrowing.member_id})</p>
-                        <p><strong>Dipinjam:</strong> ${tglPeminjaman}</p>
-                        <p><strong>Kembali Seharusnya:</strong> ${tglKembaliSeharusnya}</p>
-                        <p><strong>Dikembalikan Aktual:</strong> ${tglPengembalianAktual}</p>
-                        <p><strong>Status:</strong> <span class="${statusClass}">${borrowing.status.toUpperCase()}</span></p>
-                    `;
-                    borrowingsContainer.appendChild(borrowingCard);
-                });
+                borrowings.forEach(borrowing => borrowingsContainer.appendChild(createBorrowingCard(borrowing)));
             }
         } catch (error) {
             console.error('Error fetching borrowings:', error);
@@ -292,6 +297,124 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function createBorrowingCard(borrowing) {
+        const borrowingCard = document.createElement('div');
+        borrowingCard.className = 'book-card'; // Menggunakan style yang sama
+        borrowingCard.dataset.borrowingId = borrowing.id;
+        const tglPeminjaman = new Date(borrowing.tanggal_peminjaman).toLocaleDateString();
+        const tglKembaliSeharusnya = new Date(borrowing.tanggal_kembali_seharusnya).toLocaleDateString();
+        const tglPengembalianAktual = borrowing.tanggal_pengembalian_aktual ? new Date(borrowing.tanggal_pengembalian_aktual).toLocaleDateString() : 'Belum Dikembalikan';
+
+        let statusClass = '';
+        if (borrowing.status === 'dikembalikan') {
+            statusClass = 'status-dikembalikan';
+        } else if (borrowing.status === 'terlambat') {
+            statusClass = 'status-terlambat';
+        } else {
+            statusClass = 'status-dipinjam';
+        }
+
+        // Event live tidak membawa relasi: judul/nama diambil dari state lokal
+        const book = borrowing.book || booksById.get(borrowing.book_id);
+        const member = borrowing.member || membersById.get(borrowing.member_id);
+        borrowingCard.innerHTML = `
+            <h3>Peminjaman ID: ${borrowing.id}</h3>
+            <p><strong>Buku:</strong> ${book ? book.judul : 'N/A'} (ID: ${borrowing.book_id})</p>
+            <p><strong>Anggota:</strong> ${member ? member.nama : 'N/A'} (ID: ${borrowing.member_id})</p>
+            <p><strong>Dipinjam:</strong> ${tglPeminjaman}</p>
+            <p><strong>Kembali Seharusnya:</strong> ${tglKembaliSeharusnya}</p>
+            <p><strong>Dikembalikan Aktual:</strong> ${tglPengembalianAktual}</p>
+            <p><strong>Status:</strong> <span class="${statusClass}">${borrowing.status.toUpperCase()}</span></p>
+        `;
+        return borrowingCard;
+    }
+
+    // Muat tabel jika belum pernah dimuat; tanpa live update, muat ulang setiap kali (perilaku lama)
+    function refresh(table) {
+        if (liveConnected && loaded[table]) return;
+        if (table === 'books') fetchBooks();
+        if (table === 'members') fetchMembers();
+        if (table === 'borrowings') fetchBorrowings();
+    }
+
+    // --- Live Update (Server-Sent Events) ---
+    function patchBookStock({ id, stok, version }) {
+        const book = booksById.get(id);
+        if (!book || version <= (stockVersions.get(id) || 0)) return;
+        stockVersions.set(id, version);
+        book.stok = stok;
+        const card = booksContainer.querySelector(`[data-book-id="${id}"] .stok`);
+        if (card) card.innerHTML = `<strong>Stok:</strong> ${stok}`;
+        const option = borrowBookSelect.querySelector(`option[value="${id}"]`);
+        if (option) option.textContent = `${book.judul} (Stok: ${stok})`;
+    }
+
+    function addBook(book) {
+        if (!loaded.books || booksById.has(book.id)) return;
+        if (booksById.size === 0) booksContainer.innerHTML = '';
+        booksById.set(book.id, book);
+        booksContainer.appendChild(createBookCard(book));
+        borrowBookSelect.appendChild(createBookOption(book));
+    }
+
+    function addMember(member) {
+        if (!loaded.members || membersById.has(member.id)) return;
+        if (membersById.size === 0) membersContainer.innerHTML = '';
+        membersById.set(member.id, member);
+        membersContainer.appendChild(createMemberCard(member));
+        borrowMemberSelect.appendChild(createMemberOption(member));
+    }
+
+    function upsertBorrowing(borrowing) {
+        if (!loaded.borrowings) return;
+        const card = createBorrowingCard(borrowing);
+        const existing = borrowingsContainer.querySelector(`[data-borrowing-id="${borrowing.id}"]`);
+        if (existing) {
+            existing.replaceWith(card);
+        } else {
+            if (borrowingsById.size === 0) borrowingsContainer.innerHTML = '';
+            borrowingsContainer.appendChild(card);
+        }
+        borrowingsById.set(borrowing.id, borrowing);
+    }
+
+    function removeBorrowing({ id }) {
+        borrowingsById.delete(id);
+        const existing = borrowingsContainer.querySelector(`[data-borrowing-id="${id}"]`);
+        if (existing) existing.remove();
+    }
+
+    // Event massal (import, sweep keterlambatan) dan 'resync': muat ulang tabel yang sudah tampil
+    function reload(...tables) {
+        tables.forEach(table => {
+            if (loaded[table]) {
+                loaded[table] = false;
+                refresh(table);
+            }
+        });
+    }
+
+    function connectLiveUpdates() {
+        if (!window.EventSource) return; // Browser lama: tetap memakai muat ulang setelah mutasi
+        // EventSource tersambung ulang sendiri dan mengirim Last-Event-ID agar event yang terlewat diputar ulang
+        const source = new EventSource(`${API_BASE_URL}/events`);
+        const on = (type, handler) => source.addEventListener(type, event => handler(JSON.parse(event.data)));
+        source.addEventListener('open', () => { liveConnected = true; });
+        source.addEventListener('error', () => { liveConnected = false; });
+        on('book.stock', patchBookStock);
+        on('book.created', addBook);
+        on('member.created', addMember);
+        on('borrowing.created', upsertBorrowing);
+        on('borrowing.returned', upsertBorrowing);
+        on('borrowing.deleted', removeBorrowing);
+        on('books.imported', () => reload('books'));
+        on('members.imported', () => reload('members'));
+        on('borrowings.imported', () => reload('borrowings'));
+        on('borrowings.overdue', () => reload('borrowings'));
+        on('borrowings.archived', () => reload('borrowings'));
+        on('resync', () => reload('books', 'members', 'borrowings'));
+    }
+
     // Event Listener untuk form Tambah Buku
     addBookForm.addEventListener('submit', async (event) => {
         event.preventDefault();
@@ -322,7 +445,7 @@ document.addEventListener('DOMContentLoaded', () => {
             if (response.ok) {
                 showMessage('Buku berhasil ditambahkan!', 'success', 'book-message');
                 addBookForm.reset();
-                fetchBooks(); // Muat ulang daftar buku dan dropdown
+                if (!liveConnected) fetchBooks(); // Tanpa live update: muat ulang daftar buku dan dropdown
             } else {
                 showMessage(`Gagal menambahkan buku: ${result.message || response.statusText}`, 'error', 'book-message');
             }
@@ -358,7 +481,7 @@ document.addEventListener('DOMContentLoaded', () => {
             if (response.ok) {
                 showMessage('Anggota berhasil ditambahkan!', 'success', 'member-message');
                 addMemberForm.reset();
-                fetchMembers(); // Muat ulang daftar anggota dan dropdown
+                if (!liveConnected) fetchMembers(); // Tanpa live update: muat ulang daftar anggota dan dropdown
             } else {
                 showMessage(`Gagal menambahkan anggota: ${result.message || response.statusText}`, 'error', 'member-message');
             }
@@ -397,8 +520,10 @@ document.addEventListener('DOMContentLoaded', () => {
             if (response.ok) {
                 showMessage('Buku berhasil dipinjam!', 'success', 'borrowing-message');
                 borrowBookForm.reset();
-                fetchBooks(); // Update stok buku
-                fetchBorrowings(); // Muat ulang daftar peminjaman
+                if (!liveConnected) {
+                    fetchBooks(); // Update stok buku
+                    fetchBorrowings(); // Muat ulang daftar peminjaman
+                }
             } else {
                 showMessage(`Gagal meminjam buku: ${result.message || response.statusText}`, 'error', 'borrowing-message');
             }
@@ -429,8 +554,10 @@ document.addEventListener('DOMContentLoaded', () => {
             if (response.ok) {
                 showMessage(`Peminjaman ID ${borrowing_id} berhasil dikembalikan!`, 'success', 'return-message');
                 returnBookForm.reset();
-                fetchBooks(); // Update stok buku
-                fetchBorrowings(); // Muat ulang daftar peminjaman
+                if (!liveConnected) {
+                    fetchBooks(); // Update stok buku
+                    fetchBorrowings(); // Muat ulang daftar peminjaman
+                }
             } else {
                 showMessage(`Gagal mengembalikan buku: ${result.message || response.statusText}`, 'error', 'return-message');
             }
@@ -441,8 +568,8 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 
     // Inisialisasi awal: tampilkan Daftar Buku sebagai halaman default
-    showSection('book-list'); // Tampilkan section daftar buku
-    fetchBooks(); // Ambil data buku
+    connectLiveUpdates();
+    showSection('book-list'); // Tampilkan section daftar buku (sekaligus mengambil data buku)
     // Fetch data lain hanya jika section mereka aktif atau dibutuhkan untuk dropdown
     fetchMembers(); // Untuk dropdown peminjaman
 });
\ No newline at end of file